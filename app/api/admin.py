@@ -1,17 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.api.deps import get_admin_user
-from app.core.database import get_db
+from app.api.deps import get_admin_user, get_user_read_db, token_cache
+from app.api.orders import OrderFilters, order_page
+from app.core.database import get_db, engine, read_engine, pool_status
 from app.repositories.admin_repo import UserService
 from app.repositories.admin_repo import OrderService
 from app.repositories.admin_repo import ProductService
 from app.repositories.product_repo import ProductRepo
 from app.repositories.user_repo import UserRepo
 from app.repositories.order_repo import OrderRepo
+from app.repositories.analytics_repo import SalesRepo
+from app.schemas.analytics import DailySalesRead, ProductSalesRead
 from app.schemas.user import UserRead, UserCreate
-from app.schemas.product import ProductCreate, ProductRead
-from app.schemas.order import OrderRead, OrderStatusUpdate
-from app.core.security import hash_password
+from app.schemas.product import ProductCreate, ProductRead, ProductPage
+from app.schemas.order import OrderPage, OrderSummaryPage, OrderStatusUpdate
+from app.services.product_import import ProductImporter, iter_csv, iter_ndjson
+from app.repositories.outbox_repo import OutboxRepo
+from app.services.outbox import outbox_worker
+from app.services.images import original_url, store_original, thumbnail_pool, verify_original
+from app.core.security import hash_password_async, password_hash_pool
+from app.core.cache import product_cache, catalog_cache, recent_writes
+from app.core.idempotency import idempotency_store
+from app.core.events import broadcaster
+from app.core.rate_limit import concurrency_limiter, rate_limiter
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_id_cursor, split_page
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -25,7 +38,7 @@ async def list_users(skip: int = 0, limit: int = 100, db: AsyncSession = Depends
 async def create_user(user: UserCreate, db: AsyncSession = Depends(get_db),
                       admin_user: dict = Depends(get_admin_user)):
     service = UserService(UserRepo(db))
-    return await service.create_user(user.email, hash_password(user.password), user.role)
+    return await service.create_user(user.email, await hash_password_async(user.password), user.role)
 
 @router.delete("/users/{user_id}")
 async def delete_user(user_id: int, db: AsyncSession = Depends(get_db),
@@ -48,26 +61,30 @@ async def demote_admin_to_user(user_id: int, db: AsyncSession = Depends(get_db),
     await service.demote_admin_to_user(user_id)
     return {"detail": "Admin demoted to user"}
 
-@router.get("/users/{user_id}/orders", response_model=list[OrderRead])
-async def get_orders_by_user(user_id: int, db: AsyncSession = Depends(get_db),
+@router.get("/users/{user_id}/orders", response_model=OrderSummaryPage | OrderPage)
+async def get_orders_by_user(user_id: int, filters: OrderFilters = Depends(),
+                             db: AsyncSession = Depends(get_user_read_db),
                              admin_user: dict = Depends(get_admin_user)):
-    order_service = OrderService(OrderRepo(db))
-    return await order_service.get_orders_by_user(user_id)
+    return await order_page(OrderRepo(db), user_id, filters)
 
 @router.put("/orders/{order_id}/status")
 async def change_order_status(order_id: int, new_status: OrderStatusUpdate, db: AsyncSession = Depends(get_db),
                               admin_user: dict = Depends(get_admin_user)):
     order_service = OrderService(OrderRepo(db))
-    order = await order_service.change_order_status(order_id, new_status.status)
+    order = await order_service.change_order_status(order_id, new_status.value)
     if order:
         return order
     raise HTTPException(status_code=404, detail="Order not found")
 
-@router.get("/products", response_model=list[ProductRead])
-async def list_products( db: AsyncSession = Depends(get_db),
+@router.get("/products", response_model=ProductPage)
+async def list_products(cursor: str | None = None,
+                        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                        db: AsyncSession = Depends(get_db),
                         admin_user: dict = Depends(get_admin_user)):
     service = ProductService(ProductRepo(db))
-    return await service.list_products()
+    products = await service.list_products(limit + 1, decode_id_cursor(cursor))
+    items, next_cursor = split_page(products, limit, key=lambda p: (p.id,))
+    return {"items": items, "next_cursor": next_cursor}
 
 @router.post("/products", response_model=ProductRead)
 async def create_product(
@@ -84,6 +101,39 @@ async def create_product(
         data.image_url,
     )
 
+@router.post("/products/import")
+async def import_products(
+    request: Request,
+    format: str | None = Query(None, pattern="^(csv|ndjson)$"),
+    db: AsyncSession = Depends(get_db),
+    admin_user: dict = Depends(get_admin_user),
+):
+    # тело читается потоком, в памяти держится только текущая пачка строк
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if "csv" in content_type else "ndjson"
+    records = iter_csv(request.stream()) if format == "csv" else iter_ndjson(request.stream())
+    return await ProductImporter(ProductRepo(db)).run(records)
+
+@router.post("/products/{product_id}/image", response_model=ProductRead)
+async def upload_product_image(
+    product_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    admin_user: dict = Depends(get_admin_user),
+):
+    # сырое тело запроса с Content-Type картинки, пишется на диск потоком
+    repo = ProductRepo(db)
+    product = await repo.get_product_by_id(product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    key = await store_original(request.stream(), request.headers.get("content-type", ""))
+    await verify_original(key)
+    thumbnail_pool.submit(key)
+    product.image_key = key
+    product.image_url = original_url(key)
+    return await repo.update_product(product)
+
 @router.delete("/products/{product_id}")
 async def delete_product(
     product_id: int,
@@ -110,4 +160,34 @@ async def update_product(
         raise HTTPException(status_code=404, detail="Product not found")
     return product
 
-
+@router.get("/stats")
+async def get_stats(db: AsyncSession = Depends(get_db), admin_user: dict = Depends(get_admin_user)):
+    return {
+        "product_cache": product_cache.stats(),
+        "catalog_cache": catalog_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "password_hasher": password_hash_pool.stats(),
+        "thumbnails": thumbnail_pool.stats(),
+        "idempotency": idempotency_store.stats(),
+        "rate_limits": rate_limiter.stats(),
+        "concurrency": concurrency_limiter.stats(),
+        "events": broadcaster.stats(),
+        "outbox": {**outbox_worker.stats(), "events": await OutboxRepo(db).counts()},
+        "db_pool": pool_status(engine),
+        "read_db_pool": pool_status(read_engine) if read_engine is not engine else None,
+        "recent_writes": recent_writes.stats(),
+    }
+
+@router.get("/analytics/daily", response_model=list[DailySalesRead])
+async def sales_by_day(start: date | None = None, end: date | None = None,
+                       status: list[str] | None = Query(None),
+                       db: AsyncSession = Depends(get_db),
+                       admin_user: dict = Depends(get_admin_user)):
+    return await SalesRepo(db).daily(start, end, status)
+
+@router.get("/analytics/products", response_model=list[ProductSalesRead])
+async def sales_by_product(status: list[str] | None = Query(None),
+                           limit: int = Query(50, ge=1, le=1000),
+                           db: AsyncSession = Depends(get_db),
+                           admin_user: dict = Depends(get_admin_user)):
+    return await SalesRepo(db).by_product(status, limit)
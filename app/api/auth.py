@@ -1,19 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.core.security import hash_password
-from app.core.security import verify_password, create_access_token, create_refresh_token
+from app.core.security import hash_password_async, verify_password_async, password_needs_rehash
+from app.core.security import create_access_token, create_refresh_token
 from app.schemas.user import UserCreate, UserRead, UserLogin
 from app.models.user import User
 from app.core.database import get_db
-from app.api.deps import get_refresh_user
+from app.api.deps import get_refresh_user, limit_by_ip
 
 router = APIRouter(
     prefix="/auth",
     tags=["auth"],
 )
 
-@router.post("/register", response_model=UserRead)
+@router.post("/register", response_model=UserRead, dependencies=[Depends(limit_by_ip("auth_register"))])
 async def register(user: UserCreate,
     db: AsyncSession = Depends(get_db),
 ):
@@ -27,7 +27,7 @@ async def register(user: UserCreate,
             detail="Email already registered",
         )
 
-    new_user = User(email=user.email, hashed_password=hash_password(user.password), role=user.role)  
+    new_user = User(email=user.email, hashed_password=await hash_password_async(user.password), role=user.role)
     db.add(new_user)
     await db.commit()
     await db.refresh(new_user)
@@ -36,7 +36,7 @@ async def register(user: UserCreate,
 
     return new_user
 
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(limit_by_ip("auth_login"))])
 async def login(
     data: UserLogin,
     db: AsyncSession = Depends(get_db),
@@ -46,12 +46,17 @@ async def login(
     )
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(data.password, user.hashed_password):
+    if not user or not await verify_password_async(data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
         )
 
+    # стоимость bcrypt поменялась в настройках - перехэшируем, пока знаем пароль
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = await hash_password_async(data.password)
+        await db.commit()
+
     access_token = create_access_token(user.id, user.role)
     refresh_token = create_refresh_token(user.id)
 
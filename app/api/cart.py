@@ -1,12 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
+from app.core.responses import FastJSONResponse
 from app.api.deps import get_current_user
-from app.repositories.cart_repo import CartRepo
+from app.repositories.cart_repo import get_cart_repo
 from app.repositories.product_repo import ProductRepo
-from app.schemas.cart import CartItemCreate, CartItemUpdate, CartRead
-from app.models.cart import CartItem
-from app.models.product import Product
+from app.schemas.cart import CartItemCreate, CartItemUpdate, CartItemRead, CartRead
 
 router = APIRouter(prefix="/cart", tags=["cart"])
 
@@ -16,41 +15,34 @@ async def get_cart(
     current_user: dict = Depends(get_current_user),
 ):
     user_id = current_user["user_id"]
-    repo = CartRepo(db)
-    cart = await repo.get_or_create_cart(user_id)
+    repo = get_cart_repo(db)
+    return await repo.get_or_create_cart(user_id)
 
-    # подставляем продукт в каждый элемент
-    for item in cart.items:
-        if hasattr(item, "product_id") and not getattr(item, "product", None):
-            product = await db.get(Product, item.product_id)
-            item.product = product
 
-    return cart
-
-
-@router.post("/items")
+@router.post("/items", response_model=CartRead)
 async def add_item(
     item: CartItemCreate,
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
     user_id = current_user["user_id"]
-    cart_repo = CartRepo(db)
+    cart_repo = get_cart_repo(db)
     product_repo = ProductRepo(db)
 
-    product = await product_repo.get_product_by_id(item.product_id)
+    product = await product_repo.get_product_read(item.product_id)
     if not product or not product.is_active:
         raise HTTPException(404, "Product not available")
 
     if item.quantity > product.quantity:
         raise HTTPException(409, "Not enough stock")
 
-    cart = await cart_repo.get_or_create_cart(user_id)
-    await cart_repo.add_item(cart, product, item.quantity)
-    return cart
+    cart_id = await cart_repo.get_cart_id(user_id)
+    await cart_repo.add_item(cart_id, product, item.quantity)
+    # полная корзина нужна только для ответа
+    return await cart_repo.get_or_create_cart(user_id)
 
 
-@router.put("/items/{item_id}")
+@router.put("/items/{item_id}", response_model=CartItemRead)
 async def update_item(
     item_id: int,
     data: CartItemUpdate,
@@ -58,21 +50,20 @@ async def update_item(
     current_user: dict = Depends(get_current_user),
 ):
     user_id = current_user["user_id"]
-    cart_repo = CartRepo(db)
-    cart = await cart_repo.get_or_create_cart(user_id)
-    
-    item = await db.get(CartItem, item_id)
-    if not item or item.cart_id != cart.id:
-        raise HTTPException(404, "Item not found")
-    
+    cart_repo = get_cart_repo(db)
+
     if data.quantity <= 0:
-        await db.delete(item)
-        await db.commit()
-        return {"detail": "Item removed"}
-    
-    await cart_repo.update_item(item, data.quantity)
-    await db.refresh(item)
-    return item
+        if not await cart_repo.remove_item(user_id, item_id):
+            raise HTTPException(404, "Item not found")
+        # удаление через PUT отвечает не позицией, а сообщением - мимо response_model
+        return FastJSONResponse({"detail": "Item removed"})
+
+    item = await cart_repo.update_item(user_id, item_id, data.quantity)
+    if not item:
+        raise HTTPException(404, "Item not found")
+    # UPDATE ... RETURNING отдаёт только колонки позиции, товар - из кэша
+    product = await ProductRepo(db).get_product_read(item["product_id"])
+    return CartItemRead(**item, product=product)
 
 
 
@@ -83,10 +74,9 @@ async def delete_item(
     current_user: dict = Depends(get_current_user),
 ):
     user_id = current_user["user_id"]
-    cart_repo = CartRepo(db)
-    cart = await cart_repo.get_or_create_cart(user_id)
-    
-    success = await cart_repo.remove_item(cart.id, item_id)
+    cart_repo = get_cart_repo(db)
+
+    success = await cart_repo.remove_item(user_id, item_id)
     if not success:
         raise HTTPException(404, "Item not found")
     return {"detail": "Item removed"}
@@ -98,8 +88,7 @@ async def clear_cart(
     current_user: dict = Depends(get_current_user),
 ):
     user_id = current_user["user_id"]
-    cart_repo = CartRepo(db)
-    cart = await cart_repo.get_or_create_cart(user_id)
-    
-    await cart_repo.clear_cart(cart.id)
+    cart_repo = get_cart_repo(db)
+
+    await cart_repo.clear_cart(user_id)
     return {"detail": "Cart cleared"}
@@ -1,24 +1,62 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+import time
 import jwt
 from app.core.config import settings
+from app.core.cache import TTLCache
+from app.core.database import session_for_read
+from app.core.idempotency import idempotency_store
+from app.core.read_your_writes import mark_write, user_wrote_recently
+from app.core.rate_limit import rate_limiter
 
 security = HTTPBearer()
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
-    try:
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# проверенные access-токены -> их claims; запись живёт не дольше exp самого токена
+token_cache = TTLCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
+
+def decode_access_token(token: str) -> dict:
+    claims = token_cache.get(token)
+    if claims is None:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=["HS256"])
         if payload.get("type") != "access":
             raise HTTPException(status_code=401, detail="Invalid token type")
-        user_id = int(payload.get("sub"))
-        role = payload.get("role", "user")
-        return {"user_id": user_id, "role": role}
+        claims = {"user_id": int(payload.get("sub")), "role": payload.get("role", "user")}
+        token_cache.set(token, claims, ttl=payload.get("exp", 0) - time.time())
+    # копия, чтобы обработчики не могли испортить закэшированные claims
+    return dict(claims)
+
+def _authenticate(token: str) -> dict:
+    try:
+        return decode_access_token(token)
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), request: Request = None):
+    claims = _authenticate(credentials.credentials)
+    if request is not None and request.method not in SAFE_METHODS:
+        mark_write(request, claims)
+    return claims
+
+async def get_user_read_db(request: Request, current_user: dict = Depends(get_current_user)):
+    # списки заказов пользователя; после его собственной записи - из primary
+    async with session_for_read(user_wrote_recently(request, current_user["user_id"])) as session:
+        yield session
+
+def get_stream_user(
+    credentials: HTTPAuthorizationCredentials | None = Depends(HTTPBearer(auto_error=False)),
+    token: str | None = Query(None),
+):
+    # браузерный EventSource не умеет слать заголовки, поэтому для SSE токен можно передать в ?token=
+    if credentials is not None:
+        return _authenticate(credentials.credentials)
+    if token:
+        return _authenticate(token)
+    raise HTTPException(status_code=401, detail="Not authenticated")
+
 def get_admin_user(current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Not enough permissions")
@@ -36,3 +74,25 @@ def get_refresh_user(credentials: HTTPAuthorizationCredentials = Depends(securit
         raise HTTPException(status_code=401, detail="Refresh token expired")
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+def client_ip(request: Request) -> str:
+    if settings.TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+def limit_by_ip(name: str):
+    async def dependency(request: Request):
+        await rate_limiter.hit(name, f"ip:{client_ip(request)}")
+    return dependency
+
+def limit_by_user(name: str):
+    # лимит на пользователя из токена и отдельно на IP: один аккаунт не обойдёт лимит сменой адреса,
+    # а бот с одного адреса - перебором аккаунтов
+    async def dependency(request: Request, current_user: dict = Depends(get_current_user)):
+        if await idempotency_store.is_replay(current_user["user_id"], request.headers.get("idempotency-key"), request):
+            return
+        await rate_limiter.hit(name, f"user:{current_user['user_id']}")
+        await rate_limiter.hit(name, f"ip:{client_ip(request)}")
+    return dependency
@@ -0,0 +1,34 @@
+import os
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+
+from app.core.config import settings
+from app.core.static import IMMUTABLE
+from app.services.images import (
+    IMAGE_KEY, THUMBNAIL_NAME, find_original, original_path, thumbnail_path, thumbnail_pool,
+)
+
+router = APIRouter(prefix=settings.MEDIA_URL, tags=["media"])
+
+# имена файлов содержат хэш содержимого, поэтому ответы не меняются никогда
+
+@router.get("/originals/{key}")
+async def get_original(key: str):
+    if not IMAGE_KEY.match(key) or not os.path.exists(original_path(key)):
+        raise HTTPException(404, "Image not found")
+    return FileResponse(original_path(key), headers={"Cache-Control": IMMUTABLE})
+
+@router.get("/thumbs/{name}")
+async def get_thumbnail(name: str):
+    match = THUMBNAIL_NAME.match(name)
+    if not match or match["size"] not in settings.THUMBNAIL_SIZES:
+        raise HTTPException(404, "Image not found")
+    key = find_original(match["digest"])
+    if key is None:
+        raise HTTPException(404, "Image not found")
+    path = thumbnail_path(key, match["size"])
+    # превью строятся в фоне после загрузки; если запрос пришёл раньше - ждём ту же задачу
+    if not os.path.exists(path) and not await thumbnail_pool.ensure(key):
+        raise HTTPException(404, "Image not found")
+    return FileResponse(path, media_type="image/webp", headers={"Cache-Control": IMMUTABLE})
@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.api.deps import token_cache
+from app.core.cache import product_cache, catalog_cache
+from app.core.database import engine, pool_status
+from app.core.metrics import registry
+from app.core.security import password_hash_pool
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    gauges = {
+        "product_cache": product_cache.stats(),
+        "catalog_cache": catalog_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "password_hasher": password_hash_pool.stats(),
+        "db_pool": pool_status(engine),
+    }
+    return PlainTextResponse(registry.render(gauges), media_type="text/plain; version=0.0.4")
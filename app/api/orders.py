@@ -1,62 +1,151 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import List, Literal
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_stream_user, get_user_read_db, limit_by_user
+from app.core.cache import invalidate_products
+from app.core.config import settings
 from app.core.database import get_db
-from app.repositories.cart_repo import CartRepo
+from app.core.idempotency import idempotency_store
+from app.services.order_stream import order_status_stream
+from app.core.responses import FastJSONResponse
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_id_cursor, split_page
+from app.repositories.cart_repo import get_cart_repo
 from app.repositories.order_repo import OrderRepo
 from app.repositories.product_repo import ProductRepo
-from app.schemas.order import OrderRead
+from app.schemas.order import OrderRead, OrderPage, OrderSummary, OrderSummaryPage
 from app.schemas.order import OrderHistoryRead
-from typing import List
 
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
-@router.post("/", response_model=OrderRead)
+@router.post("/", response_model=OrderRead, dependencies=[Depends(limit_by_user("orders_create"))])
 async def create_order(
+    request: Request,
+    idempotency_key: str | None = Header(None),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     user_id = current_user["user_id"]
-    
-    cart_repo = CartRepo(db)
-    order_repo = OrderRepo(db)
-    
-    cart = await cart_repo.get_or_create_cart(user_id)
-    if not cart.items:
-        raise HTTPException(status_code=400, detail="Cart is empty")
-    
-    try:
-        order = await order_repo.create_order_from_cart(user_id, cart)
-        await db.commit()  # коммитим всё транзакционно
-    except Exception:
-        await db.rollback()
-        raise
-
-    return order
-
 
-@router.get("/", response_model=list[OrderRead])
+    async def handler():
+        cart_repo = get_cart_repo(db)
+        order_repo = OrderRepo(db)
+
+        cart = await cart_repo.get_or_create_cart(user_id)
+        if not cart.items:
+            raise HTTPException(status_code=400, detail="Cart is empty")
+
+        try:
+            order = await order_repo.create_order_from_cart(user_id, cart)
+            await db.commit()  # коммитим всё транзакционно
+        except Exception:
+            await db.rollback()
+            raise
+        invalidate_products(*(item.product_id for item in order.items))
+
+        await cart_repo.on_checkout(user_id, [item.product_id for item in cart.items])
+        return OrderRead.model_validate(order)
+
+    # повтор с тем же Idempotency-Key не создаёт второй заказ, а получает ответ первого
+    return await idempotency_store.run(user_id, idempotency_key, request, handler)
+
+
+class OrderFilters:
+    # общие параметры списка заказов для /orders/ и /admin/users/{id}/orders
+    def __init__(
+        self,
+        view: Literal["summary", "full"] = "summary",
+        status: list[str] | None = Query(None),
+        created_from: datetime | None = None,
+        created_to: datetime | None = None,
+        cursor: str | None = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    ):
+        self.view = view
+        self.statuses = status
+        self.created_from = created_from
+        self.created_to = created_to
+        self.after_id = decode_id_cursor(cursor)
+        self.limit = limit
+
+
+async def order_page(order_repo: OrderRepo, user_id: int, filters: OrderFilters):
+    args = dict(
+        statuses=filters.statuses,
+        created_from=filters.created_from,
+        created_to=filters.created_to,
+    )
+    if filters.view == "full":
+        rows = await order_repo.list_orders_by_user(user_id, filters.limit, filters.after_id, **args)
+        orders, next_cursor = split_page(rows, filters.limit, key=lambda o: (o.id,))
+        page = OrderPage(items=[OrderRead.model_validate(o) for o in orders], next_cursor=next_cursor)
+        if settings.FAST_JSON:
+            # страница уже провалидирована, сериализуем её один раз в pydantic-core
+            return FastJSONResponse(page.model_dump_json().encode("utf-8"))
+        return page
+    rows = await order_repo.list_order_summaries(user_id, filters.limit, filters.after_id, **args)
+    orders, next_cursor = split_page(rows, filters.limit, key=lambda o: (o["id"],))
+    if settings.FAST_JSON:
+        return FastJSONResponse({"items": [_summary_dict(o) for o in orders], "next_cursor": next_cursor})
+    return OrderSummaryPage(items=[OrderSummary.model_validate(dict(o)) for o in orders], next_cursor=next_cursor)
+
+
+def _summary_dict(row) -> dict:
+    # поля и порядок как у OrderSummary
+    return {
+        "id": row["id"],
+        "user_id": row["user_id"],
+        "status": row["status"],
+        "created_at": row["created_at"],
+        "item_count": row["item_count"],
+        "total_price": float(row["total_price"]),
+    }
+
+
+@router.get("/", response_model=OrderSummaryPage | OrderPage)
 async def list_orders(
-    db: AsyncSession = Depends(get_db),
+    filters: OrderFilters = Depends(),
+    db: AsyncSession = Depends(get_user_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     user_id = current_user["user_id"]
     order_repo = OrderRepo(db)
 
-    orders = await order_repo.list_orders_by_user(user_id)
-    return orders
+    return await order_page(order_repo, user_id, filters)
+
+@router.get("/stream")
+async def order_stream(current_user: dict = Depends(get_stream_user)):
+    # объявлен раньше /{order_id}, иначе "stream" попадёт в order_id
+    return StreamingResponse(
+        order_status_stream(current_user["user_id"]),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get('/{order_id}', response_model=OrderRead)
+async def get_order(
+    order_id: int, db: AsyncSession = Depends(get_user_read_db),
+    current_user: dict = Depends(get_current_user)):
+
+    order_repo = OrderRepo(db)
+    return await order_repo.get_user_order(order_id, current_user["user_id"])
 
 @router.post('/{order_id}/pay', response_model=OrderRead)
 async def pay_order( 
-    order_id: int, db: AsyncSession = Depends(get_db),
+    order_id: int, request: Request,
+    idempotency_key: str | None = Header(None),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)):
 
     user_id = current_user["user_id"]
-    order_repo = OrderRepo(db)
 
-    order = await order_repo.pay_order(order_id, user_id)
-    return order
+    async def handler():
+        order = await OrderRepo(db).pay_order(order_id, user_id)
+        return OrderRead.model_validate(order)
+
+    return await idempotency_store.run(user_id, idempotency_key, request, handler)
 
 @router.post('/{order_id}/cancel', response_model=OrderRead)
 async def cancel_order( 
@@ -71,7 +160,7 @@ async def cancel_order(
 
 @router.get('/{order_id}/history', response_model=List[OrderHistoryRead])
 async def get_order_history( 
-    order_id: int, db: AsyncSession = Depends(get_db),
+    order_id: int, db: AsyncSession = Depends(get_user_read_db),
     current_user: dict = Depends(get_current_user)):
 
     user_id = current_user["user_id"]
@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.repositories.product_repo import ProductRepo
 from app.models.product import Product
-from app.schemas.product import ProductCreate, ProductRead
-from app.core.database import get_db
+from app.schemas.product import ProductCreate, ProductRead, ProductPage
+from app.core.database import get_db, get_read_db
+from app.core.cache import catalog_cache
+from app.core.config import settings
+from app.core.http_cache import compute_etag, etag_headers, etag_matches, not_modified
+from app.core.responses import FastJSONResponse, dumps
+from app.services.images import thumbnail_urls
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_id_cursor, decode_rank_cursor, split_page
 from app.api.deps import get_admin_user
 from fastapi import Query
 
@@ -11,30 +17,82 @@ router = APIRouter(
     prefix="/products", tags=["products"]
 )
 
-@router.get("/", response_model=list[ProductRead])
-async def list_products(q: str = None, db: AsyncSession = Depends(get_db)):
-    repo = ProductRepo(db)
+@router.get("/", response_model=ProductPage)
+async def list_products(request: Request, q: str = None, cursor: str | None = None,
+                        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                        db: AsyncSession = Depends(get_read_db)):
     if q:
-        products = await repo.search_products(q)
-    else:
-        products = await repo.list_active_products()
-    return products
-
-@router.get("/search", response_model=list[ProductRead])
-async def search_products(q: str = Query(..., min_length=2), db: AsyncSession = Depends(get_db)):
-    if not q:
-        return []
-    repo = ProductRepo(db)
-    products = await repo.search_products(q)
-    return products
+        return await _search_page(request, ProductRepo(db), q, cursor, limit)
+
+    async def build():
+        repo = ProductRepo(db)
+        if settings.FAST_JSON:
+            products = await repo.list_active_product_rows(limit + 1, decode_id_cursor(cursor))
+        else:
+            products = await repo.list_active_products(limit + 1, decode_id_cursor(cursor))
+        items, next_cursor = split_page(products, limit, key=lambda p: (p.id,))
+        return _serialize_page(items, next_cursor)
+
+    return await _conditional(request, ("list", cursor, limit), build)
+
+@router.get("/search", response_model=ProductPage)
+async def search_products(request: Request,
+                          q: str = Query(..., min_length=2), cursor: str | None = None,
+                          limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                          db: AsyncSession = Depends(get_read_db)):
+    return await _search_page(request, ProductRepo(db), q, cursor, limit)
 
 @router.get("/{id}", response_model=ProductRead)
-async def get_product(id: int, db: AsyncSession = Depends(get_db)):
-    repo = ProductRepo(db)
-    product = await repo.get_product_by_id(id)
-    if not product:
-        raise HTTPException(404, "Product not found")
-    return product
+async def get_product(id: int, request: Request, db: AsyncSession = Depends(get_read_db)):
+    async def build():
+        product = await ProductRepo(db).get_product_read(id)
+        if not product:
+            raise HTTPException(404, "Product not found")
+        return product.model_dump(mode="json")
+
+    return await _conditional(request, ("product", id), build)
+
+async def _search_page(request: Request, repo: ProductRepo,
+                       q: str, cursor: str | None, limit: int):
+    async def build():
+        # результаты упорядочены по релевантности, курсор - пара (rank, id) последней строки
+        rows = await repo.search_products(q, limit + 1, decode_rank_cursor(cursor))
+        rows, next_cursor = split_page(rows, limit, key=lambda row: (row[1], row[0].id))
+        return _serialize_page([product for product, _ in rows], next_cursor)
+
+    return await _conditional(request, ("search", q, cursor, limit), build)
+
+async def _conditional(request: Request, key, build):
+    # в кэше лежит пара (etag, body): повторный запрос отдаётся готовыми байтами,
+    # с тем же If-None-Match - 304 без обращения к БД и без сериализации
+    entry = catalog_cache.get(key)
+    if entry is None:
+        body = dumps(await build())
+        entry = (compute_etag(body), body)
+        catalog_cache.set(key, entry)
+    etag, body = entry
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return FastJSONResponse(body, headers=etag_headers(etag))
+
+def _product_dict(p) -> dict:
+    # поля и порядок как у ProductRead; принимает и Product, и строку PRODUCT_READ_COLUMNS
+    return {
+        "id": p.id,
+        "name": p.name,
+        "description": p.description,
+        "price": float(p.price),
+        "quantity": p.quantity,
+        "is_active": p.is_active,
+        "image_url": p.image_url,
+        "thumbnails": thumbnail_urls(p.image_key),
+    }
+
+def _serialize_page(items: list, next_cursor: str | None) -> dict:
+    if settings.FAST_JSON:
+        return {"items": [_product_dict(p) for p in items], "next_cursor": next_cursor}
+    page = ProductPage(items=[ProductRead.model_validate(p) for p in items], next_cursor=next_cursor)
+    return page.model_dump(mode="json")
 
 @router.post("/", response_model=ProductRead, dependencies=[Depends(get_admin_user)])
 async def create_product(product_in: ProductCreate, db: AsyncSession = Depends(get_db),
@@ -50,7 +108,9 @@ async def update_product(id: int, product_in: ProductCreate, db: AsyncSession =
     product = await repo.get_product_by_id(id)
     if not product:
         raise HTTPException(404, "Product not found")
-    return await repo.update_product(product, product_in.dict())
+    for field, value in product_in.dict().items():
+        setattr(product, field, value)
+    return await repo.update_product(product)
 
 @router.delete("/{id}", dependencies=[Depends(get_admin_user)])
 async def delete_product(id: int, db: AsyncSession = Depends(get_db),
@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from app.core.config import settings
+
+_MISSING = object()
+
+
+class TTLCache:
+    # ограниченный по размеру LRU-кэш с временем жизни записей.
+    # lock нужен, потому что sync-зависимости FastAPI выполняются в threadpool
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# отдельные товары по id (ProductRead) и сериализованные страницы каталога/поиска
+product_cache = TTLCache(settings.PRODUCT_CACHE_SIZE, settings.PRODUCT_CACHE_TTL)
+catalog_cache = TTLCache(settings.CATALOG_CACHE_SIZE, settings.PRODUCT_CACHE_TTL)
+
+
+# кто недавно писал в primary: пока запись жива, его чтения не уходят на реплику,
+# которая могла ещё не догнать primary (read-your-writes). Ключи: ("user", id) и "catalog".
+# Видно только этому процессу; между воркерами окно переносит cookie (app.core.read_your_writes)
+recent_writes = TTLCache(settings.RECENT_WRITES_CACHE_SIZE, settings.READ_YOUR_WRITES_SECONDS)
+
+
+def mark_recent_write(key) -> None:
+    recent_writes.set(key, True)
+
+
+def invalidate_products(*product_ids: int, catalog_write: bool = False) -> None:
+    for product_id in product_ids:
+        product_cache.pop(product_id)
+    # любое изменение товара может сдвинуть любую страницу каталога
+    catalog_cache.clear()
+    if catalog_write:
+        # правка товара админом: иначе кэш тут же заполнится устаревшими данными с отстающей реплики.
+        # Остатки после оформления/отмены заказа каталог к primary не привязывают - иначе при
+        # постоянных заказах реплика не обслуживала бы каталог вовсе
+        mark_recent_write("catalog")
@@ -0,0 +1,153 @@
+import gzip
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен, без него отдаём только gzip
+    brotli = None
+
+# потоковые ответы (SSE) сжимать нельзя: компрессор копит данные и события застревают в буфере
+NEVER_COMPRESS = ("text/event-stream",)
+
+
+def accepted_encodings(header: str | None) -> set[str]:
+    # "gzip, br;q=0.5, deflate;q=0" -> {"gzip", "br"}
+    encodings = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            encodings.add(name)
+    return encodings
+
+
+def choose_encoding(header: str | None) -> str | None:
+    accepted = accepted_encodings(header)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._impl = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits 16+MAX_WBITS - gzip-контейнер, как у gzip.compress
+            self._impl = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._impl.process(data) if data else b""
+        return self._impl.compress(data)
+
+    def flush(self) -> bytes:
+        if self.encoding == "br":
+            return self._impl.finish()
+        return self._impl.flush()
+
+
+class CompressionMiddleware:
+    # чистый ASGI middleware: сжимает ответ по мере отправки, без буферизации всего тела.
+    # Короткие ответы (целиком меньше minimum_size) и типы вне allowlist уходят как есть.
+    def __init__(self, app, minimum_size: int = 1024, content_types: list[str] | tuple = (),
+                 gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = tuple(content_types)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                passthrough = not self._compressible(message)
+                if passthrough:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers = MutableHeaders(scope=start_message)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "etag" in headers and not headers["etag"].startswith("W/"):
+                    # сжатое представление не побайтно равно исходному - ETag становится слабым
+                    headers["etag"] = "W/" + headers["etag"]
+                if more_body:
+                    del headers["Content-Length"]
+                    data = compressor.compress(body)
+                else:
+                    data = compressor.compress(body) + compressor.flush()
+                    headers["Content-Length"] = str(len(data))
+                await send(start_message)
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            data = compressor.compress(body)
+            if not more_body:
+                data += compressor.flush()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _compressible(self, message) -> bool:
+        if message["status"] < 200 or message["status"] in (204, 304):
+            return False
+        headers = Headers(raw=message["headers"])
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        if not content_type or content_type in NEVER_COMPRESS:
+            return False
+        return content_type in self.content_types
+
+
+def gzip_bytes(data: bytes, level: int = 9) -> bytes:
+    # mtime=0: одинаковый вход даёт одинаковый .gz, сборка воспроизводима
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def brotli_bytes(data: bytes, quality: int = 11) -> bytes | None:
+    if brotli is None:
+        return None
+    return brotli.compress(data, quality=quality)
@@ -3,10 +3,96 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    READ_DATABASE_URL: str | None = None  # реплика для GET-трафика; не задана - всё читается из primary
+    READ_YOUR_WRITES_SECONDS: float = 5.0  # сколько после своей записи пользователь читает из primary
+    RECENT_WRITES_CACHE_SIZE: int = 100_000
     JWT_SECRET: str
+
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # alembic upgrade head при старте; с несколькими воркерами лучше выключить и мигрировать при деплое
+    DB_MIGRATE_ON_STARTUP: bool = True
+
     JWT_EXPIRE_MINUTES: int = 30
     JWT_REFRESH_EXPIRE_DAYS: int = 7
 
+    TOKEN_CACHE_SIZE: int = 10_000
+    TOKEN_CACHE_TTL: float = 300.0
+
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+
+    PRODUCT_CACHE_SIZE: int = 10_000
+    CATALOG_CACHE_SIZE: int = 1_000
+    PRODUCT_CACHE_TTL: float = 60.0
+
+    IMPORT_BATCH_SIZE: int = 500
+
+    CART_BACKEND: str = "sql"  # sql | memory | redis
+    CART_TTL_SECONDS: int = 7 * 24 * 3600
+    REDIS_URL: str = "redis://localhost:6379/0"
+
+    METRICS_ENABLED: bool = True
+
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_CONTENT_TYPES: list[str] = [
+        "application/json", "text/html", "text/css", "text/plain",
+        "application/javascript", "text/javascript", "image/svg+xml",
+    ]
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4  # динамическое сжатие: быстрый уровень, максимальный - при сборке фронтенда
+
+    FRONTEND_DIR: str = "frontend/dist"  # собирается build_frontend.py
+    FRONTEND_PATH: str = "/app"
+
+    MEDIA_DIR: str = "media"
+    MEDIA_URL: str = "/media"
+    MEDIA_MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024
+    THUMBNAIL_SIZES: dict[str, int] = {"list": 320, "detail": 960}  # имя -> длинная сторона, px
+    THUMBNAIL_QUALITY: int = 80
+    THUMBNAIL_WORKERS: int = 2
+
+    IDEMPOTENCY_TTL: float = 24 * 3600.0
+    IDEMPOTENCY_CACHE_SIZE: int = 100_000
+    IDEMPOTENCY_BACKEND: str = "memory"  # memory | redis (общие ключи для всех воркеров)
+    IDEMPOTENCY_LOCK_TTL: float = 30.0  # сколько живёт маркер выполнения, если воркер упал посреди запроса
+    IDEMPOTENCY_WAIT_TIMEOUT: float = 10.0  # сколько дубликат ждёт запрос, выполняющийся на другом воркере
+
+    # token bucket на маршрут: "N/second|minute|hour|day"; маршрут без записи не ограничивается
+    RATE_LIMITS: dict[str, str] = {
+        "auth_login": "10/minute",
+        "auth_register": "5/minute",
+        "orders_create": "30/minute",
+    }
+    RATE_LIMIT_BACKEND: str = "memory"  # memory | redis (общие ведра для всех воркеров)
+    TRUST_FORWARDED_FOR: bool = False  # брать IP клиента из X-Forwarded-For (только за своим прокси)
+
+    CONCURRENCY_LIMIT_ENABLED: bool = True
+    MAX_CONCURRENT_REQUESTS: int = 0  # 0 - по размеру пула БД: DB_POOL_SIZE + DB_MAX_OVERFLOW
+    MAX_QUEUED_REQUESTS: int = 100
+    QUEUE_TIMEOUT: float = 5.0
+
+    OUTBOX_ENABLED: bool = True
+    OUTBOX_WORKERS: int = 2
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL: float = 1.0
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_BACKOFF_BASE: float = 2.0
+    OUTBOX_BACKOFF_MAX: float = 600.0
+    OUTBOX_LEASE_SECONDS: float = 60.0  # захваченное, но не подтверждённое событие вернётся в очередь
+
+    EVENTS_BACKEND: str = "memory"  # memory | redis (pub/sub между воркерами)
+    SSE_QUEUE_SIZE: int = 100
+    SSE_HEARTBEAT_SECONDS: float = 15.0
+    SSE_RETRY_MS: int = 5000
+
+    FAST_JSON: bool = True  # списки товаров и заказов собираются из строк БД и кодируются orjson
+
     class Config:
         env_file = ".env"
 
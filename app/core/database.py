@@ -1,18 +1,101 @@
+import time
+
+from fastapi import Request
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from typing import AsyncGenerator
 
 from app.core.config import settings
+from app.core.read_your_writes import catalog_written_recently
 
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=False,
-)
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    # QueuePool, который считает ожидания свободного соединения: только выдачи, когда в пуле не было
+    # свободного соединения и новое открыть нельзя. Так голодание пула отличается от медленных запросов
+    def __init__(self, *args, max_overflow: int = 10, **kwargs):
+        super().__init__(*args, max_overflow=max_overflow, **kwargs)
+        self.max_overflow = max_overflow
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def _starved(self) -> bool:
+        return self.checkedin() == 0 and -1 < self.max_overflow <= self.overflow()
+
+    def _do_get(self):
+        if not self._starved():
+            return super()._do_get()
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.waits += 1
+            self.wait_seconds_total += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+def engine_options(url: str) -> dict:
+    url = make_url(url)
+    options = {"echo": False, "pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if url.get_backend_name() == "sqlite":
+        # у SQLite свой пул по умолчанию, размеры пула к нему неприменимы
+        return options
+    options.update(
+        poolclass=TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    return options
+
+
+def pool_status(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            timeout=pool.timeout(),
+        )
+    if isinstance(pool, TimedQueuePool):
+        status.update(
+            max_overflow=pool.max_overflow,
+            waits=pool.waits,
+            wait_seconds_total=round(pool.wait_seconds_total, 6),
+            max_wait_seconds=round(pool.max_wait_seconds, 6),
+            timeouts=pool.timeouts,
+        )
+    return status
+
+
+def dialect_insert(session: AsyncSession, entity):
+    # INSERT с поддержкой ON CONFLICT для текущей БД (Postgres или SQLite)
+    if session.bind.dialect.name == "postgresql":
+        return postgresql.insert(entity)
+    return sqlite.insert(entity)
+
+
+engine = create_async_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
 
 async_session = async_sessionmaker(
     engine,
@@ -20,6 +103,18 @@ async_session = async_sessionmaker(
 )
 
 
+# реплика только для чтения; без READ_DATABASE_URL это тот же primary
+if settings.READ_DATABASE_URL:
+    read_engine = create_async_engine(settings.READ_DATABASE_URL, **engine_options(settings.READ_DATABASE_URL))
+else:
+    read_engine = engine
+
+read_session = async_sessionmaker(
+    read_engine,
+    expire_on_commit=False,
+)
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -27,3 +122,15 @@ class Base(DeclarativeBase):
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
         yield session
+
+
+def session_for_read(use_primary: bool = False) -> AsyncSession:
+    if read_engine is engine or use_primary:
+        return async_session()
+    return read_session()
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    # каталог и поиск: анонимные запросы, после правки товаров - из primary
+    async with session_for_read(catalog_written_recently(request)) as session:
+        yield session
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    # очередь одного SSE-подключения; ограничена, чтобы медленный клиент не копил память
+    def __init__(self, user_id: int, maxsize: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+
+class Broadcaster:
+    # in-process pub/sub: сообщение адресовано пользователю и раскладывается по очередям
+    # всех его подключений в этом воркере. Между воркерами сообщения ходят через channel
+    def __init__(self, channel, queue_size: int):
+        self.channel = channel
+        self.queue_size = queue_size
+        self._subscribers: dict[int, set[Subscription]] = defaultdict(set)
+        self._listener: asyncio.Task | None = None
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, self.queue_size)
+        self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.user_id]
+
+    async def publish(self, user_id: int, event: str, data: dict, event_id: int | None = None) -> None:
+        self.published += 1
+        await self.channel.publish({"user_id": user_id, "event": event, "data": data, "id": event_id})
+
+    def deliver(self, message: dict) -> None:
+        for subscription in self._subscribers.get(message["user_id"], ()):
+            if subscription.queue.full():
+                # клиент не успевает читать: старое событие выбрасываем, свежий статус важнее
+                subscription.queue.get_nowait()
+                subscription.dropped += 1
+                self.dropped += 1
+            subscription.queue.put_nowait(message)
+            self.delivered += 1
+
+    def start(self) -> None:
+        self._listener = asyncio.create_task(self.channel.listen(self.deliver))
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    def stats(self) -> dict:
+        return {
+            "connections": sum(len(s) for s in self._subscribers.values()),
+            "users": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+class LocalChannel:
+    # один процесс: публикация сразу доставляется локальным подписчикам
+    def __init__(self):
+        self._deliver = None
+
+    async def publish(self, message: dict) -> None:
+        if self._deliver is not None:
+            self._deliver(message)
+
+    async def listen(self, deliver) -> None:
+        self._deliver = deliver
+        try:
+            await asyncio.Event().wait()
+        finally:
+            self._deliver = None
+
+
+class RedisChannel:
+    # несколько воркеров: публикация идёт в Redis pub/sub, каждый воркер раздаёт её своим подключениям
+    def __init__(self, client, name: str):
+        self.client = client
+        self.name = name
+
+    async def publish(self, message: dict) -> None:
+        await self.client.publish(self.name, json.dumps(message))
+
+    async def listen(self, deliver) -> None:
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.subscribe(self.name)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        deliver(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("event channel connection lost, reconnecting")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+
+
+def create_channel(backend: str):
+    if backend == "memory":
+        return LocalChannel()
+    if backend == "redis":
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("EVENTS_BACKEND=redis requires the 'redis' package") from e
+        return RedisChannel(redis.from_url(settings.REDIS_URL, decode_responses=True), "shop:events")
+    raise ValueError(f"Unknown events backend: {backend}")
+
+
+broadcaster = Broadcaster(create_channel(settings.EVENTS_BACKEND), settings.SSE_QUEUE_SIZE)
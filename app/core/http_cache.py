@@ -0,0 +1,28 @@
+import hashlib
+
+from fastapi import Request, Response
+
+
+def compute_etag(body: bytes) -> str:
+    # сильный ETag по сериализованному телу ответа: одинаков на всех воркерах для одинаковых данных
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # для If-None-Match используется слабое сравнение (RFC 9110), префикс W/ игнорируем
+    candidates = (tag.strip().removeprefix("W/") for tag in header.split(","))
+    return etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
+
+
+def etag_headers(etag: str) -> dict:
+    # браузер может хранить ответ, но обязан перепроверять его через If-None-Match
+    return {"ETag": etag, "Cache-Control": "no-cache"}
@@ -0,0 +1,218 @@
+import asyncio
+import base64
+import json
+import math
+import time
+import uuid
+from dataclasses import asdict, dataclass
+
+from fastapi import HTTPException, Request
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.responses import FastJSONResponse, dumps
+
+MAX_KEY_LENGTH = 255
+WAIT_POLL_INTERVAL = 0.05
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    fingerprint: str
+    status_code: int
+    body: bytes
+    headers: dict
+
+
+class InMemoryIdempotencyBackend:
+    # ответы и маркеры выполнения в памяти процесса: ключ защищает от повторов только в пределах
+    # одного воркера. Для нескольких воркеров - IDEMPOTENCY_BACKEND=redis
+    def __init__(self, maxsize: int, ttl: float, lock_ttl: float):
+        self._done = TTLCache(maxsize, ttl)
+        self._locks = TTLCache(maxsize, lock_ttl)
+
+    async def get(self, key: str) -> StoredResponse | None:
+        return self._done.get(key)
+
+    async def save(self, key: str, stored: StoredResponse) -> None:
+        self._done.set(key, stored)
+
+    async def acquire(self, key: str) -> str | None:
+        if self._locks.get(key) is not None:
+            return None
+        token = uuid.uuid4().hex
+        self._locks.set(key, token)
+        return token
+
+    async def release(self, key: str, token: str) -> None:
+        if self._locks.get(key) == token:
+            self._locks.pop(key)
+
+    def stats(self) -> dict:
+        return self._done.stats()
+
+
+# маркер снимает только тот, кто его поставил: после истечения lock_ttl его мог взять другой воркер
+_REDIS_RELEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisIdempotencyBackend:
+    # общий для всех воркеров: маркер выполнения - SET NX с TTL, ответ - отдельный ключ с IDEMPOTENCY_TTL
+    def __init__(self, client, ttl: float, lock_ttl: float):
+        self.client = client
+        self.ttl = math.ceil(ttl)
+        self.lock_ttl = math.ceil(lock_ttl)
+        self._release = client.register_script(_REDIS_RELEASE)
+
+    async def get(self, key: str) -> StoredResponse | None:
+        raw = await self.client.get(f"idempotency:{key}")
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return StoredResponse(**{**data, "body": base64.b64decode(data["body"])})
+
+    async def save(self, key: str, stored: StoredResponse) -> None:
+        data = {**asdict(stored), "body": base64.b64encode(stored.body).decode("ascii")}
+        await self.client.set(f"idempotency:{key}", json.dumps(data), ex=self.ttl)
+
+    async def acquire(self, key: str) -> str | None:
+        token = uuid.uuid4().hex
+        if await self.client.set(f"idempotency:{key}:lock", token, nx=True, ex=self.lock_ttl):
+            return token
+        return None
+
+    async def release(self, key: str, token: str) -> None:
+        await self._release(keys=[f"idempotency:{key}:lock"], args=[token])
+
+    def stats(self) -> dict:
+        return {"ttl": self.ttl, "lock_ttl": self.lock_ttl}
+
+
+def create_idempotency_backend(backend: str):
+    if backend == "memory":
+        return InMemoryIdempotencyBackend(
+            settings.IDEMPOTENCY_CACHE_SIZE, settings.IDEMPOTENCY_TTL, settings.IDEMPOTENCY_LOCK_TTL
+        )
+    if backend == "redis":
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("IDEMPOTENCY_BACKEND=redis requires the 'redis' package") from e
+        return RedisIdempotencyBackend(
+            redis.from_url(settings.REDIS_URL, decode_responses=True),
+            settings.IDEMPOTENCY_TTL,
+            settings.IDEMPOTENCY_LOCK_TTL,
+        )
+    raise ValueError(f"Unknown idempotency backend: {backend}")
+
+
+class IdempotencyStore:
+    # первый ответ на (user, Idempotency-Key) сохраняется на IDEMPOTENCY_TTL;
+    # параллельные дубликаты ждут выполняющийся запрос, завершённые получают сохранённый ответ.
+    # Дубликаты в том же процессе ждут future, с других воркеров - опрашивают общий backend
+    def __init__(self, backend, wait_timeout: float):
+        self.backend = backend
+        self.wait_timeout = wait_timeout
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self.replayed = 0
+        self.waited = 0
+
+    @staticmethod
+    def _fingerprint(request: Request) -> str:
+        return f"{request.method} {request.url.path}"
+
+    async def is_replay(self, user_id: int, key: str | None, request: Request) -> bool:
+        # повтор уже выполненного или выполняющегося запроса: run() отдаст ответ первого,
+        # поэтому лимиты запросов (limit_by_user) на него не тратятся
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return False
+        scope_key = f"{user_id}:{key}"
+        if scope_key in self._in_flight:
+            return True
+        stored = await self.backend.get(scope_key)
+        return stored is not None and stored.fingerprint == self._fingerprint(request)
+
+    async def run(self, user_id: int, key: str | None, request: Request, handler):
+        if key is None:
+            return await handler()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(400, "Invalid Idempotency-Key")
+        scope_key = f"{user_id}:{key}"
+        fingerprint = self._fingerprint(request)
+
+        deadline = time.monotonic() + self.wait_timeout
+        waiting = False
+        while True:
+            stored = await self.backend.get(scope_key)
+            if stored is not None:
+                if stored.fingerprint != fingerprint:
+                    raise HTTPException(422, "Idempotency-Key was already used for a different request")
+                self.replayed += 1
+                return self._response(stored, replayed=True)
+            future = self._in_flight.get(scope_key)
+            if future is None:
+                token = await self.backend.acquire(scope_key)
+                if token is not None:
+                    break
+            if not waiting:
+                self.waited += 1
+                waiting = True
+            if future is not None:
+                # если первый запрос упал без сохранённого ответа, дубликат выполнится сам
+                await asyncio.shield(future)
+                continue
+            # ключ выполняет другой воркер: ждём его ответ или снятия маркера
+            if time.monotonic() >= deadline:
+                raise HTTPException(409, "A request with this Idempotency-Key is still in progress",
+                                    headers={"Retry-After": "1"})
+            await asyncio.sleep(WAIT_POLL_INTERVAL)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[scope_key] = future
+        try:
+            stored = await self._execute(handler, fingerprint)
+            if stored.status_code < 500:
+                await self.backend.save(scope_key, stored)
+            return self._response(stored)
+        finally:
+            del self._in_flight[scope_key]
+            try:
+                await self.backend.release(scope_key, token)
+            finally:
+                future.set_result(None)
+
+    async def _execute(self, handler, fingerprint: str) -> StoredResponse:
+        # handler возвращает pydantic-модель ответа; ошибки 4xx - тоже результат, их повтор даёт тот же ответ
+        try:
+            model = await handler()
+        except HTTPException as exc:
+            if exc.status_code >= 500:
+                raise
+            return StoredResponse(fingerprint, exc.status_code, dumps({"detail": exc.detail}), dict(exc.headers or {}))
+        return StoredResponse(fingerprint, 200, model.model_dump_json().encode("utf-8"), {})
+
+    @staticmethod
+    def _response(stored: StoredResponse, replayed: bool = False) -> FastJSONResponse:
+        headers = dict(stored.headers)
+        if replayed:
+            headers["Idempotent-Replayed"] = "true"
+        return FastJSONResponse(stored.body, status_code=stored.status_code, headers=headers)
+
+    def stats(self) -> dict:
+        return {
+            **self.backend.stats(),
+            "backend": settings.IDEMPOTENCY_BACKEND,
+            "in_flight": len(self._in_flight),
+            "replayed": self.replayed,
+            "waited": self.waited,
+        }
+
+
+idempotency_store = IdempotencyStore(
+    create_idempotency_backend(settings.IDEMPOTENCY_BACKEND), settings.IDEMPOTENCY_WAIT_TIMEOUT
+)
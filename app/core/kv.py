@@ -0,0 +1,91 @@
+import time
+
+from app.core.config import settings
+
+
+class InMemoryKV:
+    # подмножество команд Redis для хэшей с TTL; для тестов и одного процесса.
+    # просроченные ключи удаляются лениво при обращении и при периодической чистке
+    SWEEP_EVERY = 1000
+
+    def __init__(self):
+        self._data: dict[str, tuple[float | None, dict[str, str]]] = {}
+        self._writes = 0
+
+    def _live(self, key: str) -> dict[str, str] | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def _writable(self, key: str) -> dict[str, str]:
+        self._writes += 1
+        if self._writes % self.SWEEP_EVERY == 0:
+            self._sweep()
+        value = self._live(key)
+        if value is None:
+            value = {}
+            self._data[key] = (None, value)
+        return value
+
+    def _sweep(self) -> None:
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._data.items() if expires_at is not None and expires_at <= now]
+        for key in expired:
+            del self._data[key]
+
+    async def hgetall(self, key: str) -> dict[str, str]:
+        return dict(self._live(key) or {})
+
+    async def hget(self, key: str, field: str) -> str | None:
+        return (self._live(key) or {}).get(field)
+
+    async def hexists(self, key: str, field: str) -> bool:
+        return field in (self._live(key) or {})
+
+    async def hset(self, key: str, field: str, value) -> None:
+        self._writable(key)[field] = str(value)
+
+    async def hsetnx(self, key: str, field: str, value) -> bool:
+        value_map = self._writable(key)
+        if field in value_map:
+            return False
+        value_map[field] = str(value)
+        return True
+
+    async def hincrby(self, key: str, field: str, amount: int) -> int:
+        value = self._writable(key)
+        value[field] = str(int(value.get(field, 0)) + amount)
+        return int(value[field])
+
+    async def hdel(self, key: str, *fields: str) -> int:
+        value = self._live(key)
+        if value is None:
+            return 0
+        removed = [field for field in fields if value.pop(field, None) is not None]
+        return len(removed)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def expire(self, key: str, seconds: int) -> None:
+        value = self._live(key)
+        if value is not None:
+            self._data[key] = (time.monotonic() + seconds, value)
+
+
+def create_kv_store(backend: str):
+    if backend == "memory":
+        return InMemoryKV()
+    if backend == "redis":
+        # redis-клиент нужен только для этого бэкенда
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("CART_BACKEND=redis requires the 'redis' package") from e
+        return redis.from_url(settings.REDIS_URL, decode_responses=True)
+    raise ValueError(f"Unknown key-value backend: {backend}")
@@ -0,0 +1,150 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# границы бакетов гистограммы латентности, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestDBStats:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# статистика БД текущего запроса; SQLAlchemy переносит контекст в свои greenlet'ы,
+# поэтому обработчики событий engine видят то же значение, что и middleware
+_request_db: ContextVar[RequestDBStats | None] = ContextVar("request_db", default=None)
+
+
+class MetricsRegistry:
+    # все счётчики меняются из event loop, поэтому обходимся без блокировок
+    def __init__(self):
+        self.latency: dict[tuple[str, str, str], list] = {}
+        self.db_by_route: dict[tuple[str, str], list] = {}
+        self.db_queries_total = 0
+        self.db_seconds_total = 0.0
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, db: RequestDBStats):
+        key = (method, route, str(status))
+        series = self.latency.get(key)
+        if series is None:
+            # [счётчики по бакетам..., сумма, количество]
+            series = self.latency[key] = [0] * len(LATENCY_BUCKETS) + [0.0, 0]
+        index = bisect_left(LATENCY_BUCKETS, seconds)
+        if index < len(LATENCY_BUCKETS):
+            series[index] += 1
+        series[-2] += seconds
+        series[-1] += 1
+
+        db_series = self.db_by_route.get(key[:2])
+        if db_series is None:
+            db_series = self.db_by_route[key[:2]] = [0, 0.0]
+        db_series[0] += db.queries
+        db_series[1] += db.seconds
+
+    def observe_query(self, seconds: float):
+        self.db_queries_total += 1
+        self.db_seconds_total += seconds
+        stats = _request_db.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.seconds += seconds
+
+    def render(self, gauges: dict[str, dict] | None = None) -> str:
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route template and status.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route, status), series in sorted(self.latency.items()):
+            labels = f'method="{_escape(method)}",route="{_escape(route)}",status="{status}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, series):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {series[-1]}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {series[-2]:.6f}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {series[-1]}")
+
+        lines += [
+            "# HELP http_request_db_queries_total Database queries issued while serving requests.",
+            "# TYPE http_request_db_queries_total counter",
+        ]
+        for (method, route), (queries, _) in sorted(self.db_by_route.items()):
+            lines.append(f'http_request_db_queries_total{{method="{_escape(method)}",route="{_escape(route)}"}} {queries}')
+        lines += [
+            "# HELP http_request_db_seconds_total Time spent in database queries while serving requests.",
+            "# TYPE http_request_db_seconds_total counter",
+        ]
+        for (method, route), (_, seconds) in sorted(self.db_by_route.items()):
+            lines.append(f'http_request_db_seconds_total{{method="{_escape(method)}",route="{_escape(route)}"}} {seconds:.6f}')
+
+        lines += [
+            "# TYPE db_queries_total counter",
+            f"db_queries_total {self.db_queries_total}",
+            "# TYPE db_query_seconds_total counter",
+            f"db_query_seconds_total {self.db_seconds_total:.6f}",
+        ]
+
+        # плоские числовые значения из stats() кэшей, пулов и т.п. отдаём как gauge
+        for prefix, values in (gauges or {}).items():
+            for name, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append(f"# TYPE {prefix}_{name} gauge")
+                lines.append(f"{prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        registry.observe_query(time.perf_counter() - context._metrics_started)
+
+
+class MetricsMiddleware:
+    # чистый ASGI middleware: не буферизует тело ответа и не создаёт лишних задач
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        stats = RequestDBStats()
+        token = _request_db.set(stats)
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_db.reset(token)
+            # шаблон маршрута, а не сырой путь: иначе /products/1, /products/2... раздуют число серий
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            registry.observe_request(scope["method"], route, status, time.perf_counter() - started, stats)
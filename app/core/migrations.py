@@ -0,0 +1,61 @@
+import logging
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.database import engine as default_engine
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = os.path.join(os.path.dirname(__file__), "..", "..", "alembic.ini")
+# ревизия, соответствующая исходной схеме от Base.metadata.create_all до появления миграций
+INITIAL_REVISION = "0001"
+
+
+def _legacy_revision(inspector) -> str:
+    # до миграций схема росла через create_all: новые таблицы появлялись, новые колонки - нет.
+    # Ревизия базы - последняя из подряд идущих, чьи объекты в ней уже есть
+    tables = inspector.get_table_names()
+    product_columns = {c["name"] for c in inspector.get_columns("products")}
+    order_columns = {c["name"] for c in inspector.get_columns("orders")}
+    markers = [
+        ("0002", "products_fts" in tables or "search_vector" in product_columns),
+        ("0003", "created_at" in order_columns),
+        ("0004", "image_key" in product_columns),
+        ("0005", "outbox_events" in tables),
+    ]
+    revision = INITIAL_REVISION
+    for candidate, present in markers:
+        if not present:
+            break
+        revision = candidate
+    return revision
+
+
+def alembic_config(connection=None) -> Config:
+    config = Config(os.path.abspath(ALEMBIC_INI))
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def _upgrade(connection, revision: str) -> None:
+    config = alembic_config(connection)
+    inspector = inspect(connection)
+    tables = inspector.get_table_names()
+    if "alembic_version" not in tables and "users" in tables:
+        # база создана create_all до миграций: помечаем ревизией её схемы, остальное догонит upgrade
+        current = _legacy_revision(inspector)
+        logger.warning("Database has no migration history, stamping it as revision %s", current)
+        command.stamp(config, current)
+    command.upgrade(config, revision)
+
+
+async def upgrade_database(engine: AsyncEngine = default_engine, revision: str = "head") -> None:
+    # миграции идут в соединении приложения, одной транзакцией (DDL в Postgres и SQLite транзакционен)
+    async with engine.begin() as conn:
+        await conn.run_sync(_upgrade, revision)
@@ -0,0 +1,53 @@
+import base64
+import json
+
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(*values) -> str:
+    # курсор непрозрачный для клиента: base64 от json-списка ключей последней строки
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str | None, size: int = 1) -> list | None:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def decode_id_cursor(cursor: str | None) -> int | None:
+    values = decode_cursor(cursor)
+    if values is None:
+        return None
+    if not isinstance(values[0], int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values[0]
+
+
+def decode_rank_cursor(cursor: str | None) -> tuple[float, int] | None:
+    values = decode_cursor(cursor, size=2)
+    if values is None:
+        return None
+    rank, last_id = values
+    if not isinstance(rank, (int, float)) or not isinstance(last_id, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return float(rank), last_id
+
+
+def split_page(rows: list, limit: int, key) -> tuple[list, str | None]:
+    # репозиторий выбирает limit + 1 строк: лишняя строка означает, что есть следующая страница
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
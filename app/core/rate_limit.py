@@ -0,0 +1,185 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+
+PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0, "day": 86400.0}
+
+
+def parse_limit(limit: str) -> tuple[float, float]:
+    # "10/minute" -> (ёмкость ведра 10, пополнение 10/60 токенов в секунду)
+    count, _, period = limit.partition("/")
+    capacity = float(count)
+    seconds = PERIODS.get(period.strip().lower())
+    if capacity <= 0 or seconds is None:
+        raise ValueError(f"Invalid rate limit: {limit!r}, expected e.g. '10/minute'")
+    return capacity, capacity / seconds
+
+
+class InMemoryBucketStore:
+    # token bucket в памяти процесса: у каждого воркера свои ведра.
+    # Старые ключи вытесняются по LRU, ведро без обращений всё равно полностью восстанавливается
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, capacity: float, refill_rate: float) -> float:
+        # 0 - токен выдан, иначе через сколько секунд появится следующий
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill_rate)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / refill_rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+# то же ведро атомарно на стороне Redis: общий лимит для всех воркеров
+_REDIS_TAKE = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(retry_after)
+"""
+
+
+class RedisBucketStore:
+    def __init__(self, client):
+        self._take = client.register_script(_REDIS_TAKE)
+
+    async def take(self, key: str, capacity: float, refill_rate: float) -> float:
+        result = await self._take(keys=[f"ratelimit:{key}"], args=[capacity, refill_rate, time.time()])
+        return float(result)
+
+
+def create_bucket_store(backend: str):
+    if backend == "memory":
+        return InMemoryBucketStore()
+    if backend == "redis":
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package") from e
+        return RedisBucketStore(redis.from_url(settings.REDIS_URL, decode_responses=True))
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+
+class RateLimiter:
+    def __init__(self, limits: dict[str, str], store):
+        self.limits = {name: parse_limit(limit) for name, limit in limits.items()}
+        self.store = store
+        self.rejected: dict[str, int] = {}
+
+    async def hit(self, name: str, key: str) -> None:
+        limit = self.limits.get(name)
+        if limit is None:
+            return
+        capacity, refill_rate = limit
+        retry_after = await self.store.take(f"{name}:{key}", capacity, refill_rate)
+        if retry_after > 0:
+            self.rejected[name] = self.rejected.get(name, 0) + 1
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    def stats(self) -> dict:
+        return {"limits": dict(settings.RATE_LIMITS), "rejected": dict(self.rejected)}
+
+
+rate_limiter = RateLimiter(settings.RATE_LIMITS, create_bucket_store(settings.RATE_LIMIT_BACKEND))
+
+
+class ConcurrencyLimiter:
+    # глобальное ограничение числа одновременно обрабатываемых запросов.
+    # Лишние ждут в очереди не дольше queue_timeout; переполненная очередь или таймаут -
+    # сразу 503 с Retry-After, пока пул соединений БД ещё не исчерпан
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.waiting = 0
+        self.shed = 0
+
+    async def acquire(self) -> bool:
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.shed += 1
+            return False
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.shed += 1
+            return False
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        return True
+
+    def release(self) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "shed": self.shed,
+        }
+
+
+# по умолчанию столько запросов, сколько соединений может выдать пул БД
+concurrency_limiter = ConcurrencyLimiter(
+    settings.MAX_CONCURRENT_REQUESTS or settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+    settings.MAX_QUEUED_REQUESTS,
+    settings.QUEUE_TIMEOUT,
+)
+
+
+class ConcurrencyLimitMiddleware:
+    # чистый ASGI middleware; пути из exempt_paths (метрики, статика) не ограничиваются
+    def __init__(self, app, limiter: ConcurrencyLimiter, exempt_paths: list[str] | tuple = ()):
+        self.app = app
+        self.limiter = limiter
+        self.exempt_paths = tuple(exempt_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+        if not await self.limiter.acquire():
+            response = JSONResponse({"detail": "Server is busy, retry later"}, status_code=503,
+                                    headers={"Retry-After": "1"})
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release()
@@ -0,0 +1,98 @@
+import hashlib
+import hmac
+import math
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+
+from app.core.cache import mark_recent_write, recent_writes
+from app.core.config import settings
+
+# Окно read-your-writes едет вместе с клиентом: после изменяющего запроса ответ ставит подписанную
+# cookie "user_id:role:until", и следующий запрос на любом воркере видит её и читает из primary.
+# recent_writes в памяти процесса остаётся запасным вариантом для клиентов, не хранящих cookie
+COOKIE_NAME = "rw"
+STATE_KEY = "read_your_writes"
+
+
+# отдельный ключ, выведенный из JWT_SECRET: один секрет не подписывает напрямую два формата токенов
+_COOKIE_KEY = hmac.new(settings.JWT_SECRET.encode(), b"rw-cookie", hashlib.sha256).digest()
+
+
+def _sign(payload: str) -> str:
+    return hmac.new(_COOKIE_KEY, payload.encode(), hashlib.sha256).hexdigest()
+
+
+def encode_cookie(user_id: int, role: str, until: float) -> str:
+    # время настенное: монотонные часы у разных процессов несравнимы
+    payload = f"{user_id}:{role}:{until:.3f}"
+    return f"{payload}:{_sign(payload)}"
+
+
+def decode_cookie(value: str | None) -> dict | None:
+    if not value:
+        return None
+    payload, _, signature = value.rpartition(":")
+    if not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    try:
+        user_id, role, until = payload.split(":")
+        if float(until) < time.time():
+            return None
+        return {"user_id": int(user_id), "role": role}
+    except ValueError:
+        return None
+
+
+def mark_write(request: Request, claims: dict) -> None:
+    # только кандидат: окно откроет ReadYourWritesMiddleware, если запрос завершился успешно.
+    # Отклонённые, упавшие и ограниченные лимитом запросы ничего не записали
+    request.state.read_your_writes = claims
+
+
+def recent_writer(request: Request) -> dict | None:
+    return decode_cookie(request.cookies.get(COOKIE_NAME))
+
+
+def user_wrote_recently(request: Request, user_id: int) -> bool:
+    if recent_writes.get(("user", user_id)):
+        return True
+    writer = recent_writer(request)
+    return writer is not None and writer["user_id"] == user_id
+
+
+def catalog_written_recently(request: Request) -> bool:
+    # каталог меняет только админка: её собственные чтения после правки идут из primary на любом воркере,
+    # а в этом процессе - и все остальные, чтобы кэш каталога не заполнился данными отстающей реплики
+    if recent_writes.get("catalog"):
+        return True
+    writer = recent_writer(request)
+    return writer is not None and writer["role"] == "admin"
+
+
+class ReadYourWritesMiddleware:
+    # чистый ASGI middleware: окно открывается по статусу ответа, а cookie ставится здесь, а не через
+    # Response в зависимости, потому что часть обработчиков (идемпотентные) возвращают готовый ответ
+    def __init__(self, app, seconds: float):
+        self.app = app
+        self.seconds = seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        state = scope.setdefault("state", {})
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and STATE_KEY in state and message["status"] < 400:
+                claims = state[STATE_KEY]
+                mark_recent_write(("user", claims["user_id"]))
+                value = encode_cookie(claims["user_id"], claims["role"], time.time() + self.seconds)
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{COOKIE_NAME}={value}; Max-Age={math.ceil(self.seconds)}; Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
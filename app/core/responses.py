@@ -0,0 +1,37 @@
+import json
+from datetime import date, datetime
+
+from fastapi.responses import Response
+
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен, без него работает stdlib json
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        # как у pydantic: UTC сериализуется с суффиксом Z
+        return value.isoformat().replace("+00:00", "Z")
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload) -> bytes:
+    if orjson is not None and settings.FAST_JSON:
+        return orjson.dumps(payload, option=orjson.OPT_UTC_Z)
+    return json.dumps(payload, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    # ответ из готовых dict/list или уже сериализованных байтов: без повторной
+    # валидации через response_model и без jsonable_encoder
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
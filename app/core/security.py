@@ -1,3 +1,7 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import bcrypt
 
 import jwt
@@ -7,11 +11,12 @@ from app.core.config import settings
 JWT_SECRET = settings.JWT_SECRET
 JWT_EXPIRE_MINUTES = settings.JWT_EXPIRE_MINUTES
 JWT_REFRESH_EXPIRE_DAYS = settings.JWT_REFRESH_EXPIRE_DAYS
+BCRYPT_ROUNDS = settings.BCRYPT_ROUNDS
 
 def hash_password(password: str) -> str:
     # bcrypt ограничивает пароль 72 байтами
     password_bytes = password.encode('utf-8')[:72]
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
@@ -20,6 +25,67 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     hashed_bytes = hashed_password.encode('utf-8')
     return bcrypt.checkpw(password_bytes, hashed_bytes)
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    # формат bcrypt: $2b$<cost>$<salt+hash>
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+class PasswordHashPool:
+    # bcrypt отпускает GIL, поэтому хватает пула потоков: event loop не блокируется,
+    # а число одновременных хэширований ограничено числом воркеров.
+    # счётчики меняются только из event loop, блокировки не нужны
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self.pending = 0
+        self.max_pending = 0
+        self.completed = 0
+        self.wait_seconds_total = 0.0
+        self.run_seconds_total = 0.0
+
+    async def run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            result = fn(*args)
+            return started, time.perf_counter(), result
+
+        self.pending += 1
+        self.max_pending = max(self.max_pending, self.pending)
+        try:
+            started, finished, result = await loop.run_in_executor(self._executor, job)
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        self.wait_seconds_total += started - submitted
+        self.run_seconds_total += finished - started
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "in_flight": min(self.pending, self.workers),
+            "queue_depth": max(self.pending - self.workers, 0),
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "run_seconds_total": round(self.run_seconds_total, 6),
+        }
+
+
+password_hash_pool = PasswordHashPool(settings.PASSWORD_HASH_WORKERS)
+
+async def hash_password_async(password: str) -> str:
+    return await password_hash_pool.run(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hash_pool.run(verify_password, plain_password, hashed_password)
+
 def create_access_token(user_id: int, role: str = "user") -> str:
     expire = datetime.utcnow() + timedelta(minutes=JWT_EXPIRE_MINUTES)
     payload = {
@@ -0,0 +1,52 @@
+import mimetypes
+import os
+import re
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from app.core.compression import accepted_encodings
+
+# имя с хэшем содержимого, которое пишет build_frontend.py: main.3f9a1c2b7d.js
+HASHED_NAME = re.compile(r"\.[0-9a-f]{10}\.[a-z0-9]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# порядок предпочтения заранее сжатых вариантов
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    # отдаёт собранный фронтенд: файл.br / файл.gz рядом с оригиналом, если клиент их принимает,
+    # хэшированные имена кэшируются навсегда, остальное (html) перепроверяется каждый раз
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        request_headers = Headers(scope=scope)
+        accepted = accepted_encodings(request_headers.get("accept-encoding"))
+        response = None
+        for encoding, suffix in PRECOMPRESSED:
+            if encoding not in accepted:
+                continue
+            variant = f"{full_path}{suffix}"
+            try:
+                variant_stat = os.stat(variant)
+            except OSError:
+                continue
+            response = FileResponse(variant, status_code=status_code, stat_result=variant_stat,
+                                    media_type=self._media_type(full_path))
+            response.headers["Content-Encoding"] = encoding
+            break
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        response.headers["Vary"] = "Accept-Encoding"
+        if HASHED_NAME.search(os.fspath(full_path)):
+            response.headers["Cache-Control"] = IMMUTABLE
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    @staticmethod
+    def _media_type(path) -> str:
+        # тип по исходному имени, а не по .gz/.br
+        return mimetypes.guess_type(os.fspath(path))[0] or "text/plain"
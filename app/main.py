@@ -1,17 +1,54 @@
+import logging
+import os
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
-from app.api import auth, products, cart, orders, admin
-from app.core.database import engine, Base
+from app.api import auth, products, cart, orders, admin, media, metrics
+from app.core.config import settings
+from app.core.database import engine, read_engine
+from app.core.migrations import upgrade_database
+from app.core.metrics import MetricsMiddleware, instrument_engine
+from app.core.compression import CompressionMiddleware
+from app.core.static import PrecompressedStaticFiles
+from app.core.rate_limit import ConcurrencyLimitMiddleware, concurrency_limiter
+from app.core.read_your_writes import ReadYourWritesMiddleware
+from app.core.events import broadcaster
+from app.services.outbox import outbox_worker
 from fastapi.middleware.cors import CORSMiddleware
 
+logger = logging.getLogger(__name__)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    if settings.DB_MIGRATE_ON_STARTUP:
+        await upgrade_database()
+    broadcaster.start()
+    if settings.OUTBOX_ENABLED:
+        outbox_worker.start()
+    elif settings.EVENTS_BACKEND == "memory":
+        # статусы заказов попадают в /orders/stream только из outbox-воркера этого же процесса
+        logger.warning("OUTBOX_ENABLED=false with EVENTS_BACKEND=memory: /orders/stream will never emit events")
+    else:
+        logger.warning("OUTBOX_ENABLED=false: /orders/stream only receives events published by other instances")
     yield
+    if settings.OUTBOX_ENABLED:
+        await outbox_worker.stop()
+    await broadcaster.stop()
 
 app = FastAPI(title="Ecommerce Backend", lifespan=lifespan)
 
+if settings.CONCURRENCY_LIMIT_ENABLED:
+    # внутри CORS, чтобы 503 тоже получали CORS-заголовки; метрики, статика и долгоживущие
+    # SSE-подключения не ограничиваются
+    app.add_middleware(
+        ConcurrencyLimitMiddleware,
+        limiter=concurrency_limiter,
+        exempt_paths=["/metrics", "/orders/stream", settings.MEDIA_URL, settings.FRONTEND_PATH],
+    )
+
+if settings.READ_DATABASE_URL:
+    # окно read-your-writes в подписанной cookie: следующий запрос может попасть на другой воркер
+    app.add_middleware(ReadYourWritesMiddleware, seconds=settings.READ_YOUR_WRITES_SECONDS)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -21,8 +58,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        content_types=settings.COMPRESSION_CONTENT_TYPES,
+        gzip_level=settings.GZIP_LEVEL,
+        brotli_quality=settings.BROTLI_QUALITY,
+    )
+
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+    if read_engine is not engine:
+        instrument_engine(read_engine)
+    app.add_middleware(MetricsMiddleware)
+
 app.include_router(auth.router)
 app.include_router(products.router)
 app.include_router(cart.router)
 app.include_router(orders.router)
 app.include_router(admin.router)
+app.include_router(media.router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
+
+if os.path.isdir(settings.FRONTEND_DIR):
+    app.mount(settings.FRONTEND_PATH, PrecompressedStaticFiles(directory=settings.FRONTEND_DIR, html=True), name="frontend")
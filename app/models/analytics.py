@@ -0,0 +1,27 @@
+from datetime import date
+
+from sqlalchemy import Date, Float, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from app.core.database import Base
+
+# сводные таблицы продаж; обновляются инкрементально при смене статуса заказа
+# (SalesRepo.apply_transition), а не пересчитываются по order_items
+
+class SalesDaily(Base):
+    __tablename__ = "sales_daily"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    status: Mapped[str] = mapped_column(String(50), primary_key=True)
+    orders: Mapped[int] = mapped_column(Integer, default=0)
+    units: Mapped[int] = mapped_column(Integer, default=0)
+    revenue: Mapped[float] = mapped_column(Float, default=0)
+
+
+class ProductSales(Base):
+    __tablename__ = "product_sales"
+
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), primary_key=True)
+    status: Mapped[str] = mapped_column(String(50), primary_key=True)
+    orders: Mapped[int] = mapped_column(Integer, default=0)
+    units: Mapped[int] = mapped_column(Integer, default=0)
+    revenue: Mapped[float] = mapped_column(Float, default=0)
@@ -21,6 +21,7 @@ class CartItem(Base):
     price: Mapped[float] = mapped_column()
     cart = relationship("Cart", back_populates="items")
     product = relationship("Product") 
+    # уникальный индекс (cart_id, product_id) обслуживает и выборки по одному cart_id
     __table_args__ = (
         UniqueConstraint("cart_id", "product_id"),
     )
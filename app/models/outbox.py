@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.core.database import Base
+
+# события для побочных эффектов (письма, вебхуки, уведомления) пишутся в той же транзакции,
+# что и изменение заказа, а доставляются фоновым OutboxWorker вне пути запроса
+
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    topic: Mapped[str] = mapped_column(String(100))
+    payload: Mapped[dict] = mapped_column(JSON)
+    status: Mapped[str] = mapped_column(String(20), default="pending")  # pending, done, failed
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    # когда событие можно брать в работу: после захвата воркером - конец аренды, после ошибки - время ретрая
+    available_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    processed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (Index("ix_outbox_events_status_available", "status", "available_at"),)
@@ -1,6 +1,7 @@
-from sqlalchemy import String, Boolean, DateTime, func, Integer
+from sqlalchemy import String, Boolean, DateTime, func, Integer, Index, text
 from sqlalchemy.orm import Mapped, mapped_column
 from app.core.database import Base
+from app.services.images import thumbnail_urls
 
 class Product(Base):
     __tablename__ = "products"
@@ -13,3 +14,23 @@ class Product(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     image_url: Mapped[str | None] = mapped_column(String(1000), nullable=True)  
+    image_key: Mapped[str | None] = mapped_column(String(80), nullable=True)  # загруженный файл в MEDIA_DIR
+
+    # каталог читает только активные товары по id; частичный индекс не растёт за счёт снятых с продажи.
+    # Условие записано так же, как его компилирует Product.is_active == True, иначе планировщик
+    # SQLite не сопоставит запрос с индексом
+    __table_args__ = (
+        Index(
+            "ix_products_active_id", "id",
+            postgresql_where=text("is_active = true"),
+            sqlite_where=text("is_active = 1"),
+        ),
+    )
+
+    @property
+    def thumbnails(self) -> dict[str, str] | None:
+        return thumbnail_urls(self.image_key)
+
+
+# Полнотекстовый индекс (tsvector + GIN в Postgres, FTS5 с триггерами в SQLite) живёт вне ORM-модели,
+# поддерживается самой БД и создаётся миграцией migrations/versions/0002_product_search.py
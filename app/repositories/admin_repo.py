@@ -1,6 +1,8 @@
 from app.repositories.user_repo import UserRepo
-from app.repositories.order_repo import OrderRepo
+from app.repositories.order_repo import OrderRepo, order_event
+from app.repositories.outbox_repo import OutboxRepo
 from app.repositories.product_repo import ProductRepo
+from app.repositories.analytics_repo import SalesRepo
 from app.models.product import Product
 from app.schemas.product import ProductCreate
 from fastapi import HTTPException
@@ -47,15 +49,26 @@ class OrderService:
     def __init__(self, repo: OrderRepo):
         self.repo = repo
 
-    async def get_orders_by_user(self, user_id: int):
-        return await self.repo.list_orders_by_user(user_id)
+    async def get_orders_by_user(self, user_id: int, limit: int, after_id: int | None = None, **filters):
+        return await self.repo.list_orders_by_user(user_id, limit, after_id, **filters)
 
     async def change_order_status(self, order_id: int, new_status: str):
         order = await self.repo.get_order_by_id(order_id)
         if not order:
             return None
-        order.status = new_status
-        return await self.repo.update_order(order)
+        old_status = order.status
+        # статус меняется, только если его не успели сменить параллельно (оплата или отмена
+        # пользователем); иначе дельты аналитики и событие outbox посчитались бы от устаревшего статуса
+        if not await self.repo.set_status(order.id, old_status, new_status):
+            await self.repo.db.rollback()
+            raise HTTPException(409, "Order status was changed concurrently, retry")
+        await SalesRepo(self.repo.db).apply_transition(order.id, old_status, new_status)
+        await OutboxRepo(self.repo.db).add(
+            "order.status_changed", order_event(order.id, order.user_id, old_status, new_status)
+        )
+        await self.repo.db.commit()
+        await self.repo.db.refresh(order, ["status"])
+        return order
 
     
 
@@ -63,8 +76,8 @@ class ProductService:
     def __init__(self, repo: ProductRepo):
         self.repo = repo
 
-    async def list_products(self):
-        return await self.repo.list_active_products()
+    async def list_products(self, limit: int, after_id: int | None = None):
+        return await self.repo.list_active_products(limit, after_id)
 
     async def create_product(self, name: str, description: str, price: float, quantity: int, image_url: str | None = None):
         product = Product(name=name, description=description, price=price, quantity=quantity, image_url=image_url)
@@ -0,0 +1,132 @@
+from datetime import date
+
+from sqlalchemy import select, delete, func, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import dialect_insert
+from app.models.analytics import SalesDaily, ProductSales
+from app.models.order import Order, OrderItem
+
+
+# без фильтра по статусу считаем только продажи: отменённые и неоплаченные заказы выручкой не являются
+SOLD_STATUSES = ("paid", "shipped", "delivered")
+
+
+def _as_date(value) -> date:
+    # SQLite возвращает date() строкой
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+class SalesRepo:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def apply_transition(self, order_id: int, from_status: str | None, to_status: str):
+        # переносим вклад одного заказа из корзины from_status в to_status:
+        # один агрегирующий запрос по позициям этого заказа и два upsert'а с дельтами
+        if from_status == to_status:
+            return
+        result = await self.db.execute(
+            select(
+                func.date(Order.created_at).label("day"),
+                OrderItem.product_id,
+                func.sum(OrderItem.quantity).label("units"),
+                func.sum(OrderItem.quantity * OrderItem.price).label("revenue"),
+            )
+            .join(OrderItem, OrderItem.order_id == Order.id)
+            .where(Order.id == order_id)
+            .group_by(func.date(Order.created_at), OrderItem.product_id)
+        )
+        rows = result.all()
+        if not rows:
+            return
+
+        moves = [(to_status, 1)] + ([(from_status, -1)] if from_status else [])
+        day = _as_date(rows[0].day)
+        units = sum(row.units for row in rows)
+        revenue = sum(row.revenue for row in rows)
+
+        await self._upsert(SalesDaily, [SalesDaily.day, SalesDaily.status], [
+            {"day": day, "status": status, "orders": sign, "units": sign * units, "revenue": sign * revenue}
+            for status, sign in moves
+        ])
+        await self._upsert(ProductSales, [ProductSales.product_id, ProductSales.status], [
+            {"product_id": row.product_id, "status": status, "orders": sign,
+             "units": sign * row.units, "revenue": sign * row.revenue}
+            for row in rows
+            for status, sign in moves
+        ])
+
+    async def _upsert(self, model, keys, rows: list[dict]):
+        stmt = dialect_insert(self.db, model).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=keys,
+            set_={
+                "orders": model.orders + stmt.excluded.orders,
+                "units": model.units + stmt.excluded.units,
+                "revenue": model.revenue + stmt.excluded.revenue,
+            },
+        )
+        await self.db.execute(stmt)
+
+    async def daily(self, start: date | None, end: date | None, statuses: list[str] | None):
+        stmt = select(
+            SalesDaily.day,
+            func.sum(SalesDaily.orders).label("orders"),
+            func.sum(SalesDaily.units).label("units"),
+            func.sum(SalesDaily.revenue).label("revenue"),
+        ).group_by(SalesDaily.day).order_by(SalesDaily.day)
+        if start:
+            stmt = stmt.where(SalesDaily.day >= start)
+        if end:
+            stmt = stmt.where(SalesDaily.day <= end)
+        stmt = stmt.where(SalesDaily.status.in_(statuses or SOLD_STATUSES))
+        result = await self.db.execute(stmt)
+        return result.mappings().all()
+
+    async def by_product(self, statuses: list[str] | None, limit: int):
+        stmt = select(
+            ProductSales.product_id,
+            func.sum(ProductSales.orders).label("orders"),
+            func.sum(ProductSales.units).label("units"),
+            func.sum(ProductSales.revenue).label("revenue"),
+        ).group_by(ProductSales.product_id).order_by(func.sum(ProductSales.revenue).desc()).limit(limit)
+        stmt = stmt.where(ProductSales.status.in_(statuses or SOLD_STATUSES))
+        result = await self.db.execute(stmt)
+        return result.mappings().all()
+
+    async def rebuild(self):
+        # полный пересчёт сводок из orders/order_items (для бэкфилла существующих данных)
+        await self.db.execute(delete(SalesDaily))
+        await self.db.execute(delete(ProductSales))
+
+        day = func.date(Order.created_at)
+        await self.db.execute(
+            dialect_insert(self.db, SalesDaily).from_select(
+                ["day", "status", "orders", "units", "revenue"],
+                select(
+                    day,
+                    Order.status,
+                    func.count(func.distinct(Order.id)),
+                    func.coalesce(func.sum(OrderItem.quantity), 0),
+                    func.coalesce(func.sum(OrderItem.quantity * OrderItem.price), literal(0.0)),
+                )
+                .join(OrderItem, OrderItem.order_id == Order.id)
+                .group_by(day, Order.status),
+            )
+        )
+        await self.db.execute(
+            dialect_insert(self.db, ProductSales).from_select(
+                ["product_id", "status", "orders", "units", "revenue"],
+                select(
+                    OrderItem.product_id,
+                    Order.status,
+                    func.count(func.distinct(Order.id)),
+                    func.sum(OrderItem.quantity),
+                    func.sum(OrderItem.quantity * OrderItem.price),
+                )
+                .join(Order, Order.id == OrderItem.order_id)
+                .group_by(OrderItem.product_id, Order.status),
+            )
+        )
+        await self.db.commit()
@@ -1,8 +1,12 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, update
 from sqlalchemy.orm import selectinload
 from sqlalchemy.orm import joinedload
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.core.kv import create_kv_store
 from app.models.cart import Cart, CartItem
+from app.repositories.kv_cart_repo import KVCartRepo
 
 class CartRepo:
     def __init__(self, db: AsyncSession):
@@ -28,6 +32,22 @@ class CartRepo:
 
         return cart
 
+    async def get_cart_id(self, user_id: int) -> int:
+        # только id корзины, без загрузки позиций и товаров
+        cart_id = await self.db.scalar(select(Cart.id).where(Cart.user_id == user_id))
+        if cart_id is None:
+            await self.db.execute(
+                dialect_insert(self.db, Cart)
+                .values(user_id=user_id)
+                .on_conflict_do_nothing(index_elements=[Cart.user_id])
+            )
+            cart_id = await self.db.scalar(select(Cart.id).where(Cart.user_id == user_id))
+            await self.db.commit()
+        return cart_id
+
+    def _user_cart_id(self, user_id: int):
+        return select(Cart.id).where(Cart.user_id == user_id).scalar_subquery()
+
     async def get_item(self, cart_id: int, product_id: int):
         result = await self.db.execute(
             select(CartItem).where(
@@ -37,42 +57,66 @@ class CartRepo:
         )
         return result.scalar_one_or_none()
 
-    async def add_item(self, cart: Cart, product, quantity: int):
-        item = await self.get_item(cart.id, product.id)
-
-        if item:
-            item.quantity += quantity
-        else:
-            item = CartItem(
-                cart_id=cart.id,
-                product_id=product.id,
-                quantity=quantity,
-                price=product.price,  
-            )
-            self.db.add(item)
-
+    async def add_item(self, cart_id: int, product, quantity: int):
+        # атомарный upsert: повторное добавление товара увеличивает количество
+        stmt = dialect_insert(self.db, CartItem).values(
+            cart_id=cart_id,
+            product_id=product.id,
+            quantity=quantity,
+            price=product.price,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CartItem.cart_id, CartItem.product_id],
+            set_={"quantity": CartItem.quantity + stmt.excluded.quantity},
+        )
+        await self.db.execute(stmt)
         await self.db.commit()
-        return item
 
-    async def update_item(self, item: CartItem, quantity: int):
-        item.quantity = quantity
+    async def update_item(self, user_id: int, item_id: int, quantity: int):
+        result = await self.db.execute(
+            update(CartItem)
+            .where(CartItem.id == item_id, CartItem.cart_id == self._user_cart_id(user_id))
+            .values(quantity=quantity)
+            .returning(CartItem.id, CartItem.product_id, CartItem.quantity, CartItem.price)
+            .execution_options(synchronize_session=False)
+        )
+        item = result.mappings().one_or_none()
         await self.db.commit()
         return item
 
-    async def remove_item(self, cart_id: int, item_id: int):
-        item = await self.db.get(CartItem, item_id)
-        if item and item.cart_id == cart_id:
-            await self.db.delete(item)
-            await self.db.commit()
-            return True
-        return False
+    async def remove_item(self, user_id: int, item_id: int):
+        result = await self.db.execute(
+            delete(CartItem)
+            .where(CartItem.id == item_id, CartItem.cart_id == self._user_cart_id(user_id))
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount > 0
 
-    async def clear_cart(self, cart_id: int):
+    async def clear_cart(self, user_id: int):
         await self.db.execute(
-            delete(CartItem).where(CartItem.cart_id == cart_id)
+            delete(CartItem)
+            .where(CartItem.cart_id == self._user_cart_id(user_id))
+            .execution_options(synchronize_session=False)
         )
         await self.db.commit()
 
     async def delete_item(self, item: CartItem):
         await self.db.delete(item)
         await self.db.commit()
+
+    async def on_checkout(self, user_id: int, product_ids: list[int]):
+        # позиции уже удалены в транзакции create_order_from_cart
+        pass
+
+
+_cart_store = None
+
+def get_cart_repo(db: AsyncSession):
+    # бэкенд корзины выбирается в настройках: sql, memory или redis
+    global _cart_store
+    if settings.CART_BACKEND == "sql":
+        return CartRepo(db)
+    if _cart_store is None:
+        _cart_store = create_kv_store(settings.CART_BACKEND)
+    return KVCartRepo(db, _cart_store)
@@ -0,0 +1,96 @@
+from dataclasses import dataclass, field
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.product import Product
+
+
+@dataclass
+class KVCartItem:
+    # в KV-корзине позиция однозначно определяется товаром, поэтому id == product_id
+    id: int
+    product_id: int
+    quantity: int
+    price: float
+    product: Product | None = None
+
+
+@dataclass
+class KVCart:
+    id: int
+    items: list[KVCartItem] = field(default_factory=list)
+
+
+class KVCartRepo:
+    # корзина живёт в key-value хранилище как хэш {product_id: quantity, "product_id:price": price} с TTL.
+    # Цена фиксируется при первом добавлении товара, как в SQL-корзине.
+    # в реляционные таблицы она попадает только при оформлении заказа
+    def __init__(self, db: AsyncSession, store):
+        self.db = db
+        self.store = store
+
+    def _key(self, user_id: int) -> str:
+        return f"cart:{user_id}"
+
+    @staticmethod
+    def _price_field(product_id: int) -> str:
+        return f"{product_id}:price"
+
+    async def _touch(self, user_id: int) -> None:
+        await self.store.expire(self._key(user_id), settings.CART_TTL_SECONDS)
+
+    async def get_or_create_cart(self, user_id: int) -> KVCart:
+        raw = await self.store.hgetall(self._key(user_id))
+        quantities, prices = {}, {}
+        for name, value in raw.items():
+            product_id, _, suffix = name.partition(":")
+            if suffix:
+                prices[int(product_id)] = float(value)
+            else:
+                quantities[int(product_id)] = int(value)
+        if not quantities:
+            return KVCart(id=user_id)
+
+        result = await self.db.execute(select(Product).where(Product.id.in_(quantities)).order_by(Product.id))
+        # корзины, созданные до хранения цены, получают текущую цену товара
+        items = [
+            KVCartItem(id=p.id, product_id=p.id, quantity=quantities[p.id], price=prices.get(p.id, p.price), product=p)
+            for p in result.scalars()
+        ]
+        return KVCart(id=user_id, items=items)
+
+    async def get_cart_id(self, user_id: int) -> int:
+        return user_id
+
+    async def add_item(self, cart_id: int, product, quantity: int):
+        key = self._key(cart_id)
+        await self.store.hincrby(key, str(product.id), quantity)
+        await self.store.hsetnx(key, self._price_field(product.id), product.price)
+        await self._touch(cart_id)
+
+    async def update_item(self, user_id: int, item_id: int, quantity: int):
+        key = self._key(user_id)
+        if not await self.store.hexists(key, str(item_id)):
+            return None
+        await self.store.hset(key, str(item_id), quantity)
+        price = await self.store.hget(key, self._price_field(item_id))
+        await self._touch(user_id)
+        if price is None:  # корзина от версии без цены в хэше
+            price = await self.db.scalar(select(Product.price).where(Product.id == item_id))
+        return {"id": item_id, "product_id": item_id, "quantity": quantity, "price": float(price or 0)}
+
+    async def remove_item(self, user_id: int, item_id: int):
+        removed = await self.store.hdel(self._key(user_id), str(item_id), self._price_field(item_id))
+        await self._touch(user_id)
+        return removed > 0
+
+    async def clear_cart(self, user_id: int):
+        await self.store.delete(self._key(user_id))
+
+    async def on_checkout(self, user_id: int, product_ids: list[int]):
+        # заказ уже закоммичен: удаляем только оформленные товары, добавленные после чтения корзины остаются
+        fields = [name for product_id in product_ids for name in (str(product_id), self._price_field(product_id))]
+        if fields:
+            await self.store.hdel(self._key(user_id), *fields)
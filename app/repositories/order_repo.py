@@ -1,14 +1,21 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, delete, update, insert, case, func
+from sqlalchemy.orm import selectinload, joinedload
 from fastapi import HTTPException
 
 from app.models.order import Order, OrderItem, OrderHistory
-from app.models.cart import CartItem
-from app.repositories.product_repo import ProductRepo
+from app.models.cart import Cart, CartItem
+from app.models.product import Product
+from app.core.cache import invalidate_products
+from app.repositories.analytics_repo import SalesRepo
+from app.repositories.outbox_repo import OutboxRepo
 from datetime import datetime
 
 
+def order_event(order_id: int, user_id: int, from_status: str | None, to_status: str) -> dict:
+    return {"order_id": order_id, "user_id": user_id, "from_status": from_status, "status": to_status}
+
+
 class OrderRepo:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -17,52 +24,125 @@ class OrderRepo:
         if not cart.items:
             raise HTTPException(status_code=400, detail="Cart is empty")
 
-        product_repo = ProductRepo(self.db)
+        wanted = {item.product_id: item.quantity for item in cart.items}
+        product_ids = sorted(wanted)  # единый порядок блокировок, чтобы не ловить дедлоки
+
+        # одним запросом читаем и блокируем все товары корзины
+        result = await self.db.execute(
+            select(Product.id, Product.name, Product.price, Product.quantity, Product.is_active)
+            .where(Product.id.in_(product_ids))
+            .order_by(Product.id)
+            .with_for_update()
+        )
+        stock = {row.id: row for row in result}
+        for product_id in product_ids:
+            row = stock.get(product_id)
+            if not row or not row.is_active:
+                raise HTTPException(status_code=404, detail=f"Product {product_id} not available")
+            if wanted[product_id] > row.quantity:
+                raise HTTPException(status_code=409, detail=f"Not enough stock for {row.name}")
+
+        # списываем остатки одним UPDATE; условие quantity >= :q не даёт уйти в минус,
+        # даже если БД не поддерживает FOR UPDATE (SQLite)
+        decrement = case(wanted, value=Product.id)
+        result = await self.db.execute(
+            update(Product)
+            .where(Product.id.in_(product_ids), Product.quantity >= decrement)
+            .values(quantity=Product.quantity - decrement)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(product_ids):
+            raise HTTPException(status_code=409, detail="Not enough stock")
 
         # создаём заказ
         order = Order(user_id=user_id, status="pending")
         self.db.add(order)
         await self.db.flush()  # чтобы получить order.id для OrderItem
 
-        for cart_item in cart.items:
-            product = await product_repo.get_product_by_id(cart_item.product_id)
-            if not product or not product.is_active:
-                raise HTTPException(status_code=404, detail=f"Product {cart_item.product_id} not available")
-            if cart_item.quantity > product.quantity:
-                raise HTTPException(status_code=409, detail=f"Not enough stock for {product.name}")
-
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=product.id,
-                quantity=cart_item.quantity,
-                price=product.price
-            )
-            self.db.add(order_item)
-
-            product.quantity -= cart_item.quantity
-
-        # чистим корзину
-        await self.db.execute(delete(CartItem).where(CartItem.cart_id == cart.id))
+        await self.db.execute(
+            insert(OrderItem),
+            [
+                {
+                    "order_id": order.id,
+                    "product_id": product_id,
+                    "quantity": wanted[product_id],
+                    "price": stock[product_id].price,
+                }
+                for product_id in product_ids
+            ],
+        )
 
-        await self.db.flush()  # отправляем все изменения в базу, но не коммитим
+        # чистим корзину; корзину из key-value хранилища очищает её репозиторий после коммита
+        if isinstance(cart, Cart):
+            await self.db.execute(delete(CartItem).where(CartItem.cart_id == cart.id))
 
         # запись в историю
         history = OrderHistory(order_id=order.id, status=order.status, user_id=user_id)
         self.db.add(history)
+        await self.db.flush()  # отправляем все изменения в базу, но не коммитим
+        await SalesRepo(self.db).apply_transition(order.id, None, order.status)
+        await OutboxRepo(self.db).add("order.created", order_event(order.id, user_id, None, order.status))
+        # кэши товаров сбрасывает вызывающий код после commit: сброс до commit дал бы параллельному
+        # чтению закэшировать остатки до списания
+
+        return await self._load_order(order.id)
 
-        # перечитываем заказ с items и product
+    async def _load_order(self, order_id: int):
+        # заказ с items и product одним запросом; populate_existing обновляет объекты,
+        # уже загруженные в сессию, после UPDATE в обход ORM
         stmt = (
             select(Order)
-            .where(Order.id == order.id)
-            .options(selectinload(Order.items).selectinload(OrderItem.product))
+            .where(Order.id == order_id)
+            .options(joinedload(Order.items).joinedload(OrderItem.product))
+            .execution_options(populate_existing=True)
         )
         result = await self.db.execute(stmt)
-        return result.scalar_one()
+        return result.unique().scalar_one()
+
+    def _user_orders(self, user_id: int, after_id: int | None, statuses: list[str] | None,
+                     created_from: datetime | None, created_to: datetime | None):
+        # новые заказы первыми, keyset по id
+        conditions = [Order.user_id == user_id]
+        if after_id is not None:
+            conditions.append(Order.id < after_id)
+        if statuses:
+            conditions.append(Order.status.in_(statuses))
+        if created_from is not None:
+            conditions.append(Order.created_at >= created_from)
+        if created_to is not None:
+            conditions.append(Order.created_at < created_to)
+        return conditions
+
+    async def list_order_summaries(self, user_id: int, limit: int, after_id: int | None = None,
+                                   statuses: list[str] | None = None, created_from: datetime | None = None,
+                                   created_to: datetime | None = None):
+        # количество позиций и сумма считаются в SQL, items и products не загружаются
+        stmt = (
+            select(
+                Order.id,
+                Order.user_id,
+                Order.status,
+                Order.created_at,
+                func.count(OrderItem.id).label("item_count"),
+                func.coalesce(func.sum(OrderItem.price * OrderItem.quantity), 0).label("total_price"),
+            )
+            .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+            .where(*self._user_orders(user_id, after_id, statuses, created_from, created_to))
+            .group_by(Order.id)
+            .order_by(Order.id.desc())
+            .limit(limit + 1)
+        )
+        result = await self.db.execute(stmt)
+        return result.mappings().all()
 
-    async def list_orders_by_user(self, user_id: int):
+    async def list_orders_by_user(self, user_id: int, limit: int, after_id: int | None = None,
+                                  statuses: list[str] | None = None, created_from: datetime | None = None,
+                                  created_to: datetime | None = None):
         stmt = (
             select(Order)
-            .where(Order.user_id == user_id)
+            .where(*self._user_orders(user_id, after_id, statuses, created_from, created_to))
+            .order_by(Order.id.desc())
+            .limit(limit + 1)
             .options(
                 selectinload(Order.items).selectinload(OrderItem.product)
             )
@@ -70,66 +150,70 @@ class OrderRepo:
         result = await self.db.execute(stmt)
         return result.scalars().all()
 
+    async def get_user_order(self, order_id: int, user_id: int):
+        order = await self.get_order_by_id(order_id)
+        if not order or order.user_id != user_id:
+            raise HTTPException(status_code=404, detail="Order not found")
+        return order
+
+
+    async def set_status(self, order_id: int, from_status: str, to_status: str, user_id: int | None = None) -> bool:
+        # условный UPDATE: проверка статуса и смена статуса - одна атомарная операция
+        conditions = [Order.id == order_id, Order.status == from_status]
+        if user_id is not None:
+            conditions.append(Order.user_id == user_id)
+        result = await self.db.execute(
+            update(Order)
+            .where(*conditions)
+            .values(status=to_status)
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        )
+        return result.scalar_one_or_none() is not None
+
+    async def _transition(self, order_id: int, user_id: int, from_status: str, to_status: str, error: str):
+        if await self.set_status(order_id, from_status, to_status, user_id):
+            return
+        # лишний запрос только на неуспешном пути, чтобы отличить 404 от 409
+        found = await self.db.scalar(select(Order.id).where(Order.id == order_id, Order.user_id == user_id))
+        if found is None:
+            raise HTTPException(status_code=404, detail="Order not found")
+        raise HTTPException(status_code=409, detail=error)
 
     async def pay_order(self, order_id: int, user_id: int):
         async with self.db.begin():  # транзакция
-            stmt = select(Order).where(Order.id == order_id, Order.user_id == user_id)
-            result = await self.db.execute(stmt)
-            order = result.scalar_one_or_none()
-
-            if not order:
-                raise HTTPException(status_code=404, detail="Order not found")
-
-            if order.status != "pending":
-                raise HTTPException(status_code=409, detail="Order cannot be paid")
-
-            order.status = "paid"
-
+            await self._transition(order_id, user_id, "pending", "paid", "Order cannot be paid")
             # запись в историю
-            history = OrderHistory(order_id=order.id, status=order.status, user_id=user_id)
-            self.db.add(history)
+            await self.db.execute(insert(OrderHistory).values(order_id=order_id, status="paid", user_id=user_id))
+            await SalesRepo(self.db).apply_transition(order_id, "pending", "paid")
+            await OutboxRepo(self.db).add("order.paid", order_event(order_id, user_id, "pending", "paid"))
 
-        # перечитываем заказ 
-        stmt = (
-            select(Order)
-            .where(Order.id == order.id)
-            .options(selectinload(Order.items).selectinload(OrderItem.product))
-        )
-        result = await self.db.execute(stmt)
-        return result.scalar_one()
+        return await self._load_order(order_id)
 
 
     async def cancel_order(self, order_id: int, user_id: int):
         async with self.db.begin():  # транзакция
-            stmt = select(Order).where(Order.id == order_id, Order.user_id == user_id).options(
-                selectinload(Order.items).selectinload(OrderItem.product)
+            await self._transition(order_id, user_id, "pending", "cancelled", "Order cannot be cancelled")
+
+            # возвращаем товары на склад одним UPDATE ... FROM order_items
+            result = await self.db.execute(
+                update(Product)
+                .where(Product.id == OrderItem.product_id, OrderItem.order_id == order_id)
+                .values(quantity=Product.quantity + OrderItem.quantity)
+                .returning(Product.id)
+                .execution_options(synchronize_session=False)
             )
-            result = await self.db.execute(stmt)
-            order = result.scalar_one_or_none()
-
-            if not order:
-                raise HTTPException(status_code=404, detail="Order not found")
-
-            if order.status != "pending":
-                raise HTTPException(status_code=409, detail="Order cannot be cancelled")
-
-            # возвращаем товары на склад
-            for item in order.items:
-                item.product.quantity += item.quantity
-
-            order.status = "cancelled"
+            restocked = result.scalars().all()
 
             # запись в историю
-            history = OrderHistory(order_id=order.id, status=order.status, user_id=user_id)
-            self.db.add(history)
+            await self.db.execute(
+                insert(OrderHistory).values(order_id=order_id, status="cancelled", user_id=user_id)
+            )
+            await SalesRepo(self.db).apply_transition(order_id, "pending", "cancelled")
+            await OutboxRepo(self.db).add("order.cancelled", order_event(order_id, user_id, "pending", "cancelled"))
 
-        stmt = (
-            select(Order)
-            .where(Order.id == order.id)
-            .options(selectinload(Order.items).selectinload(OrderItem.product))
-        )
-        result = await self.db.execute(stmt)
-        return result.scalar_one()
+        invalidate_products(*restocked)
+        return await self._load_order(order_id)
 
     async def get_order_history(self, order_id: int, user_id: int):
         stmt = select(OrderHistory).where(OrderHistory.order_id == order_id, OrderHistory.user_id == user_id)
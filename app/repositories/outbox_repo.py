@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.outbox import OutboxEvent
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class OutboxRepo:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def add(self, topic: str, payload: dict):
+        # без commit: событие фиксируется вместе с транзакцией вызывающего кода
+        await self.db.execute(
+            insert(OutboxEvent).values(topic=topic, payload=payload, status="pending", attempts=0, available_at=utcnow())
+        )
+
+    async def claim(self, limit: int, lease_seconds: float) -> list:
+        # захват пачки: кандидаты по индексу (status, available_at), затем условный UPDATE,
+        # который сдвигает available_at на время аренды. Если другой воркер успел раньше,
+        # условие available_at <= now для его строк уже не выполнится и они не вернутся
+        now = utcnow()
+        candidates = (
+            select(OutboxEvent.id)
+            .where(OutboxEvent.status == "pending", OutboxEvent.available_at <= now)
+            .order_by(OutboxEvent.id)
+            .limit(limit)
+        )
+        if self.db.bind.dialect.name == "postgresql":
+            candidates = candidates.with_for_update(skip_locked=True)
+        ids = (await self.db.execute(candidates)).scalars().all()
+        if not ids:
+            await self.db.commit()
+            return []
+        result = await self.db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(ids), OutboxEvent.status == "pending", OutboxEvent.available_at <= now)
+            .values(available_at=now + timedelta(seconds=lease_seconds), attempts=OutboxEvent.attempts + 1)
+            .returning(OutboxEvent.id, OutboxEvent.topic, OutboxEvent.payload, OutboxEvent.attempts)
+        )
+        events = [dict(row) for row in result.mappings().all()]
+        await self.db.commit()
+        events.sort(key=lambda event: event["id"])
+        return events
+
+    async def mark_done(self, ids: list[int]):
+        if ids:
+            await self.db.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_(ids))
+                .values(status="done", processed_at=utcnow(), last_error=None)
+            )
+        await self.db.commit()
+
+    async def mark_failed(self, event_id: int, error: str, retry_in: float | None):
+        # retry_in=None - попытки исчерпаны, событие остаётся в таблице со статусом failed
+        values = {"last_error": error[:2000]}
+        if retry_in is None:
+            values.update(status="failed", processed_at=utcnow())
+        else:
+            values["available_at"] = utcnow() + timedelta(seconds=retry_in)
+        await self.db.execute(update(OutboxEvent).where(OutboxEvent.id == event_id).values(**values))
+        await self.db.commit()
+
+    async def counts(self) -> dict[str, int]:
+        result = await self.db.execute(select(OutboxEvent.status, func.count()).group_by(OutboxEvent.status))
+        return {status: count for status, count in result.all()}
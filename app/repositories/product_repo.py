@@ -1,10 +1,19 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, exists
 from app.models.product import Product
-from app.schemas.product import ProductCreate
+from app.schemas.product import ProductCreate, ProductRead
+from app.core.cache import product_cache, invalidate_products
+from app.core.database import dialect_insert
 from app.models.order import OrderItem
+from app.repositories.product_search import build_search_query
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
+PRODUCT_READ_COLUMNS = (
+    Product.id, Product.name, Product.description, Product.price,
+    Product.quantity, Product.is_active, Product.image_url, Product.image_key,
+)
+
+
 class ProductRepo:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -12,16 +21,45 @@ class ProductRepo:
     async def get_product_by_id(self, product_id: int) -> Product | None:
         result = await self.db.execute(select(Product).where(Product.id == product_id))
         return result.scalar_one_or_none()
+
+    async def get_product_read(self, product_id: int) -> ProductRead | None:
+        # кэшированный снимок товара только для чтения; для изменений нужен get_product_by_id
+        cached = product_cache.get(product_id)
+        if cached is not None:
+            return cached
+        product = await self.get_product_by_id(product_id)
+        if not product:
+            return None
+        snapshot = ProductRead.model_validate(product)
+        product_cache.set(product_id, snapshot)
+        return snapshot
     
-    async def list_active_products(self) -> list[Product]:
-        result = await self.db.execute(select(Product).where(Product.is_active == True))
+    async def list_active_products(self, limit: int, after_id: int | None = None) -> list[Product]:
+        stmt = select(Product).where(Product.is_active == True).order_by(Product.id).limit(limit)
+        if after_id is not None:
+            stmt = stmt.where(Product.id > after_id)
+        result = await self.db.execute(stmt)
         return result.scalars().all()
 
+    async def list_active_product_rows(self, limit: int, after_id: int | None = None):
+        # те же товары, что list_active_products, но строками без ORM-объектов и identity map
+        stmt = (
+            select(*PRODUCT_READ_COLUMNS)
+            .where(Product.is_active == True)
+            .order_by(Product.id)
+            .limit(limit)
+        )
+        if after_id is not None:
+            stmt = stmt.where(Product.id > after_id)
+        result = await self.db.execute(stmt)
+        return result.all()
+
     async def create_product(self, product: Product) -> Product:
         self.db.add(product)
         try:
             await self.db.commit()
             await self.db.refresh(product)
+            invalidate_products(product.id, catalog_write=True)
             return product
         except IntegrityError:
             await self.db.rollback()
@@ -34,8 +72,27 @@ class ProductRepo:
     async def update_product(self, product: Product) -> Product:
         await self.db.commit()
         await self.db.refresh(product)
+        invalidate_products(product.id, catalog_write=True)
         return product
     
+    async def upsert_products(self, rows: list[dict]) -> int:
+        # многострочный INSERT ... ON CONFLICT (name) DO UPDATE; флаг is_active не трогаем у существующих
+        stmt = dialect_insert(self.db, Product).values([{**row, "is_active": True} for row in rows])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Product.name],
+            set_={
+                "description": stmt.excluded.description,
+                "price": stmt.excluded.price,
+                "quantity": stmt.excluded.quantity,
+                "image_url": stmt.excluded.image_url,
+            },
+        ).returning(Product.id)
+        result = await self.db.execute(stmt)
+        product_ids = result.scalars().all()
+        await self.db.commit()
+        invalidate_products(*product_ids, catalog_write=True)
+        return len(product_ids)
+
     async def is_used_in_orders(self, product_id: int) -> bool:
         stmt = select(
             exists().where(OrderItem.product_id == product_id)
@@ -46,11 +103,18 @@ class ProductRepo:
     async def delete_product(self, product: Product) -> None:
         await self.db.delete(product)
         await self.db.commit()
+        invalidate_products(product.id, catalog_write=True)
 
-    async def search_products(self, query: str) -> list[Product]:
-        result = await self.db.execute(
-            select(Product).where(Product.is_active == True).where(
-                Product.name.ilike(f"%{query}%") | Product.description.ilike(f"%{query}%")
-            )
-        )
-        return result.scalars().all()
\ No newline at end of file
+    async def search_products(
+        self, query: str, limit: int, after: tuple[float, int] | None = None
+    ) -> list[tuple[Product, float]]:
+        built = build_search_query(self.db.bind.dialect.name, query)
+        if built is None:
+            return []
+        stmt, rank = built
+        stmt = stmt.order_by(rank.desc(), Product.id).limit(limit)
+        if after is not None:
+            after_rank, after_id = after
+            stmt = stmt.where((rank < after_rank) | ((rank == after_rank) & (Product.id > after_id)))
+        result = await self.db.execute(stmt)
+        return [(product, float(score)) for product, score in result.all()]
\ No newline at end of file
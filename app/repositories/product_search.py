@@ -0,0 +1,47 @@
+import re
+
+from sqlalchemy import Select, select, func, literal, literal_column, table, column
+from app.models.product import Product
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# веса полей: совпадение в названии важнее совпадения в описании
+_NAME_WEIGHT = 10.0
+_DESCRIPTION_WEIGHT = 1.0
+
+
+def tokenize(query: str) -> list[str]:
+    return _TOKEN_RE.findall(query.lower())
+
+
+def build_search_query(dialect: str, query: str) -> tuple[Select, object] | None:
+    # запрос (Product, rank) по полнотекстовому индексу; чем больше rank, тем релевантнее.
+    # каждый токен ищется как префикс, чтобы поиск работал по мере набора
+    tokens = tokenize(query)
+    if not tokens:
+        return None
+
+    if dialect == "postgresql":
+        tsquery = func.to_tsquery("simple", " & ".join(f"{t}:*" for t in tokens))
+        vector = literal_column("products.search_vector")
+        rank = func.ts_rank(vector, tsquery) + func.similarity(Product.name, query)
+        match = vector.op("@@")(tsquery) | Product.name.op("%")(query)
+        stmt = select(Product, rank.label("rank")).where(match)
+    elif dialect == "sqlite":
+        fts = table("products_fts", column("rowid"))
+        # bm25 возвращает "меньше - лучше", разворачиваем знак
+        rank = -func.bm25(literal_column("products_fts"), _NAME_WEIGHT, _DESCRIPTION_WEIGHT)
+        match_expr = " ".join('"' + t.replace('"', '""') + '"*' for t in tokens)
+        stmt = (
+            select(Product, rank.label("rank"))
+            .join(fts, fts.c.rowid == Product.id)
+            .where(literal_column("products_fts").op("MATCH")(match_expr))
+        )
+    else:
+        rank = literal(0.0)
+        pattern = f"%{query}%"
+        stmt = select(Product, rank.label("rank")).where(
+            Product.name.ilike(pattern) | Product.description.ilike(pattern)
+        )
+
+    return stmt.where(Product.is_active == True), rank
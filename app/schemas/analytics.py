@@ -0,0 +1,16 @@
+from datetime import date
+from pydantic import BaseModel
+
+
+class DailySalesRead(BaseModel):
+    day: date
+    orders: int
+    units: int
+    revenue: float
+
+
+class ProductSalesRead(BaseModel):
+    product_id: int
+    orders: int
+    units: int
+    revenue: float
@@ -17,6 +17,7 @@ class OrderRead(BaseModel):
     id: int
     user_id: int
     status: str
+    created_at: datetime | None = None
     items: list[OrderItemRead]
     
     model_config = {"from_attributes": True}
@@ -26,6 +27,27 @@ class OrderRead(BaseModel):
     def total_price(self) -> float:
         return sum(item.price * item.quantity for item in self.items)
 
+class OrderSummary(BaseModel):
+    id: int
+    user_id: int
+    status: str
+    created_at: datetime | None = None
+    item_count: int
+    total_price: float
+
+    model_config = {"from_attributes": True}
+
+
+class OrderSummaryPage(BaseModel):
+    items: list[OrderSummary]
+    next_cursor: str | None = None
+
+
+class OrderPage(BaseModel):
+    items: list[OrderRead]
+    next_cursor: str | None = None
+
+
 class OrderHistoryRead(BaseModel):
     status: str
     changed_at: datetime
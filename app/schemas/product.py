@@ -18,9 +18,14 @@ class ProductRead(BaseModel):
     quantity: int
     is_active: bool
     image_url: str | None
+    thumbnails: dict[str, str] | None = None  # размер из THUMBNAIL_SIZES -> URL превью WebP
 
     class Config:
-        orm_mode = True
+        from_attributes = True
+
+class ProductPage(BaseModel):
+    items: list[ProductRead]
+    next_cursor: str | None = None
 
 class ProductUpdate(BaseModel):
     name: str | None = None
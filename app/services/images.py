@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+try:
+    from PIL import Image
+except ImportError:  # без Pillow загрузка работает, но превью не строятся
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+IMAGE_TYPES = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/gif": "gif",
+}
+# ключ изображения - sha256 содержимого и расширение: одинаковые файлы хранятся один раз
+IMAGE_KEY = re.compile(r"^[0-9a-f]{64}\.(jpg|png|webp|gif)$")
+THUMBNAIL_NAME = re.compile(r"^(?P<digest>[0-9a-f]{64})-(?P<size>[a-z]+)\.webp$")
+
+
+def originals_dir() -> str:
+    return os.path.join(settings.MEDIA_DIR, "originals")
+
+
+def thumbs_dir() -> str:
+    return os.path.join(settings.MEDIA_DIR, "thumbs")
+
+
+def original_path(key: str) -> str:
+    return os.path.join(originals_dir(), key)
+
+
+def thumbnail_path(key: str, size: str) -> str:
+    digest = key.split(".", 1)[0]
+    return os.path.join(thumbs_dir(), f"{digest}-{size}.webp")
+
+
+def original_url(key: str) -> str:
+    return f"{settings.MEDIA_URL}/originals/{key}"
+
+
+def thumbnail_urls(key: str | None) -> dict[str, str] | None:
+    if not key or Image is None:
+        return None
+    digest = key.split(".", 1)[0]
+    return {size: f"{settings.MEDIA_URL}/thumbs/{digest}-{size}.webp" for size in settings.THUMBNAIL_SIZES}
+
+
+async def store_original(chunks, content_type: str) -> str:
+    # тело пишется во временный файл по частям, хэш считается на лету,
+    # затем файл атомарно переименовывается в своё content-addressed имя
+    extension = IMAGE_TYPES.get(content_type.split(";")[0].strip().lower())
+    if extension is None:
+        raise HTTPException(415, f"Unsupported image type, expected one of: {', '.join(IMAGE_TYPES)}")
+    os.makedirs(originals_dir(), exist_ok=True)
+    tmp_path = os.path.join(originals_dir(), f".upload-{uuid.uuid4().hex}")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > settings.MEDIA_MAX_UPLOAD_BYTES:
+                    raise HTTPException(413, "Image is too large")
+                digest.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+        if size == 0:
+            raise HTTPException(400, "Empty image")
+        key = f"{digest.hexdigest()}.{extension}"
+        os.replace(tmp_path, original_path(key))
+        return key
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _verify(key: str) -> None:
+    with Image.open(original_path(key)) as image:
+        image.verify()
+
+
+async def verify_original(key: str) -> None:
+    # битый файл или подменённый Content-Type отсекаем сразу, а не при построении превью
+    if Image is None:
+        return
+    try:
+        await asyncio.to_thread(_verify, key)
+    except Exception:
+        os.remove(original_path(key))
+        raise HTTPException(400, "File is not a valid image")
+
+
+def find_original(digest: str) -> str | None:
+    for extension in IMAGE_TYPES.values():
+        key = f"{digest}.{extension}"
+        if os.path.exists(original_path(key)):
+            return key
+    return None
+
+
+def _render_thumbnails(key: str) -> list[str]:
+    os.makedirs(thumbs_dir(), exist_ok=True)
+    written = []
+    with Image.open(original_path(key)) as image:
+        image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        for size, max_side in settings.THUMBNAIL_SIZES.items():
+            target = thumbnail_path(key, size)
+            if os.path.exists(target):
+                continue
+            thumb = image.copy()
+            thumb.thumbnail((max_side, max_side), Image.LANCZOS)
+            tmp_path = f"{target}.{uuid.uuid4().hex}.tmp"
+            thumb.save(tmp_path, "WEBP", quality=settings.THUMBNAIL_QUALITY, method=4)
+            os.replace(tmp_path, target)
+            written.append(size)
+    return written
+
+
+class ThumbnailPool:
+    # ресайз и кодирование WebP в Pillow отпускают GIL, поэтому хватает пула потоков.
+    # Повторная постановка того же ключа присоединяется к уже идущей задаче.
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnails")
+        self._pending: dict[str, asyncio.Future] = {}
+        self.completed = 0
+        self.failed = 0
+        self.run_seconds_total = 0.0
+
+    def submit(self, key: str) -> asyncio.Future | None:
+        if Image is None:
+            return None
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._run(key))
+            self._pending[key] = future
+            future.add_done_callback(lambda _: self._pending.pop(key, None))
+        return future
+
+    async def ensure(self, key: str) -> bool:
+        future = self.submit(key)
+        if future is None:
+            return False
+        return await asyncio.shield(future)
+
+    async def _run(self, key: str) -> bool:
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            await loop.run_in_executor(self._executor, _render_thumbnails, key)
+        except Exception:
+            self.failed += 1
+            logger.exception("thumbnail generation failed for %s", key)
+            return False
+        self.completed += 1
+        self.run_seconds_total += time.perf_counter() - started
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "enabled": Image is not None,
+            "pending": len(self._pending),
+            "completed": self.completed,
+            "failed": self.failed,
+            "run_seconds_total": round(self.run_seconds_total, 6),
+        }
+
+
+thumbnail_pool = ThumbnailPool(settings.THUMBNAIL_WORKERS)
@@ -0,0 +1,42 @@
+import asyncio
+
+from app.core.config import settings
+from app.core.events import broadcaster
+from app.core.responses import dumps
+from app.services.outbox import subscribe
+
+ORDER_TOPICS = ("order.created", "order.paid", "order.cancelled", "order.status_changed")
+
+
+async def push_order_status(event: dict):
+    # смены статуса приходят из outbox, поэтому в поток попадают только закоммиченные изменения
+    payload = event["payload"]
+    await broadcaster.publish(payload["user_id"], "order_status", payload, event_id=event["id"])
+
+for topic in ORDER_TOPICS:
+    subscribe(topic)(push_order_status)
+
+
+def format_sse(message: dict) -> bytes:
+    lines = [f"event: {message['event']}"]
+    if message.get("id") is not None:
+        lines.append(f"id: {message['id']}")
+    lines.append("data: " + dumps(message["data"]).decode("utf-8"))
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+async def order_status_stream(user_id: int):
+    # пока событий нет, подключение - это одна ждущая корутина и пустая очередь;
+    # комментарий-пинг раз в SSE_HEARTBEAT_SECONDS не даёт прокси закрыть соединение
+    subscription = broadcaster.subscribe(user_id)
+    try:
+        yield f"retry: {settings.SSE_RETRY_MS}\n\n".encode("ascii")
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), settings.SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+                continue
+            yield format_sse(message)
+    finally:
+        broadcaster.unsubscribe(subscription)
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import random
+import time
+from collections import defaultdict
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.repositories.outbox_repo import OutboxRepo
+
+logger = logging.getLogger(__name__)
+
+# topic -> обработчики; "*" получает все события.
+# Обработчик: async def handler(event: dict) с ключами id, topic, payload, attempts.
+# Доставка at-least-once: при ретрае обработчик может получить событие повторно
+_handlers: dict[str, list] = defaultdict(list)
+
+
+def subscribe(topic: str):
+    def decorator(handler):
+        _handlers[topic].append(handler)
+        return handler
+    return decorator
+
+
+@subscribe("*")
+async def log_event(event: dict):
+    logger.info("outbox %s #%s %s", event["topic"], event["id"], event["payload"])
+
+
+class OutboxWorker:
+    # пул asyncio-задач, которые забирают события пачками и раздают их подписчикам.
+    # Ошибка обработчика - ретрай с экспоненциальной задержкой, после max_attempts - статус failed
+    def __init__(self, session_factory, workers: int, batch_size: int, poll_interval: float,
+                 max_attempts: int, backoff_base: float, backoff_max: float, lease_seconds: float):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease_seconds = lease_seconds
+        self._tasks: list[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+        self.processed = 0
+        self.retried = 0
+        self.failed = 0
+        self.handler_seconds_total = 0.0
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._tasks = [asyncio.create_task(self._run(i), name=f"outbox-worker-{i}") for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        # текущая пачка дорабатывается, новые не берутся; незавершённые события
+        # вернутся в работу после окончания аренды
+        self._stopping.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, index: int) -> None:
+        while not self._stopping.is_set():
+            try:
+                handled = await self.drain_once()
+            except Exception:
+                logger.exception("outbox worker %s failed to fetch events", index)
+                handled = 0
+            if handled < self.batch_size:
+                # очередь пуста или почти пуста - ждём, полная пачка - сразу за следующей
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def drain_once(self) -> int:
+        async with self.session_factory() as session:
+            repo = OutboxRepo(session)
+            events = await repo.claim(self.batch_size, self.lease_seconds)
+            done = []
+            for event in events:
+                error = await self._dispatch(event)
+                if error is None:
+                    done.append(event["id"])
+                    continue
+                if event["attempts"] >= self.max_attempts:
+                    self.failed += 1
+                    logger.error("outbox event #%s (%s) failed permanently: %s", event["id"], event["topic"], error)
+                    await repo.mark_failed(event["id"], error, retry_in=None)
+                else:
+                    self.retried += 1
+                    await repo.mark_failed(event["id"], error, retry_in=self._backoff(event["attempts"]))
+            await repo.mark_done(done)
+            self.processed += len(done)
+            return len(events)
+
+    async def _dispatch(self, event: dict) -> str | None:
+        started = time.perf_counter()
+        try:
+            for handler in _handlers.get(event["topic"], []) + _handlers.get("*", []):
+                await handler(event)
+        except Exception as exc:
+            logger.warning("outbox handler failed for event #%s: %r", event["id"], exc)
+            return repr(exc)
+        finally:
+            self.handler_seconds_total += time.perf_counter() - started
+        return None
+
+    def _backoff(self, attempts: int) -> float:
+        # экспонента с джиттером, чтобы массовый сбой не ретраился синхронно
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "processed": self.processed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "handler_seconds_total": round(self.handler_seconds_total, 6),
+        }
+
+
+outbox_worker = OutboxWorker(
+    async_session,
+    workers=settings.OUTBOX_WORKERS,
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    poll_interval=settings.OUTBOX_POLL_INTERVAL,
+    max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+    backoff_base=settings.OUTBOX_BACKOFF_BASE,
+    backoff_max=settings.OUTBOX_BACKOFF_MAX,
+    lease_seconds=settings.OUTBOX_LEASE_SECONDS,
+)
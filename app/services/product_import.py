@@ -0,0 +1,126 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterator
+
+from pydantic import ValidationError
+from sqlalchemy.exc import DBAPIError
+
+from app.core.config import settings
+from app.repositories.product_repo import ProductRepo
+from app.schemas.product import ProductCreate
+
+# отчёт об ошибках ограничен, чтобы импорт огромного битого файла не съел память
+MAX_REPORTED_ERRORS = 1000
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict | str]]:
+    row = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row, f"Invalid JSON: {e}"
+            continue
+        yield row, record if isinstance(record, dict) else "Row must be a JSON object"
+
+
+async def iter_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict | str]]:
+    header = None
+    row = 0
+    pending = ""
+    async for line in iter_lines(chunks):
+        # запись CSV может занимать несколько строк внутри кавычек:
+        # копим строки, пока число кавычек не станет чётным
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            continue
+        record, pending = pending, ""
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield row, {name: (value if value != "" else None) for name, value in zip(header, values)}
+    if pending:
+        yield row + 1, "Unterminated quoted field"
+
+
+class ProductImporter:
+    def __init__(self, repo: ProductRepo, batch_size: int | None = None):
+        self.repo = repo
+        self.batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        self.processed = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+
+    def _error(self, row: int, error) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": error})
+
+    async def run(self, records: AsyncIterator[tuple[int, dict | str]]) -> dict:
+        batch: dict[str, tuple[int, dict]] = {}
+        async for row, record in records:
+            self.processed += 1
+            if isinstance(record, str):
+                self._error(row, record)
+                continue
+            try:
+                product = ProductCreate.model_validate(record)
+            except ValidationError as e:
+                self._error(row, e.errors(include_url=False, include_context=False))
+                continue
+            # внутри одного INSERT ... ON CONFLICT имя не может встретиться дважды:
+            # побеждает последняя строка файла
+            batch.pop(product.name, None)
+            batch[product.name] = (row, product.model_dump())
+            if len(batch) >= self.batch_size:
+                await self._flush(batch)
+                batch = {}
+        if batch:
+            await self._flush(batch)
+        return {
+            "processed": self.processed,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+    async def _flush(self, batch: dict[str, tuple[int, dict]]) -> None:
+        rows = list(batch.values())
+        try:
+            self.imported += await self.repo.upsert_products([data for _, data in rows])
+            return
+        except DBAPIError:
+            await self.repo.db.rollback()
+        # пачка упала целиком - повторяем построчно, чтобы найти виноватые строки
+        for row, data in rows:
+            try:
+                self.imported += await self.repo.upsert_products([data])
+            except DBAPIError as e:
+                await self.repo.db.rollback()
+                self._error(row, str(e.orig))
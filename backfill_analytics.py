@@ -0,0 +1,11 @@
+import asyncio
+from app.core.database import async_session
+from app.repositories.analytics_repo import SalesRepo
+
+async def backfill_analytics():
+    async with async_session() as session:
+        await SalesRepo(session).rebuild()
+    print('Sales analytics rebuilt')
+
+if __name__ == "__main__":
+    asyncio.run(backfill_analytics())
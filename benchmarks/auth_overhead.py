@@ -0,0 +1,42 @@
+# Микробенчмарк накладных расходов авторизации на один запрос:
+# полный jwt.decode против попадания в кэш проверенных токенов.
+#
+#   python -m benchmarks.auth_overhead [--iterations 50000]
+import argparse
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///./bench.db")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret-key-with-enough-length")
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.api.deps import get_current_user, token_cache
+from app.core.security import create_access_token
+
+
+def measure(iterations: int, credentials: HTTPAuthorizationCredentials, cached: bool) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        if not cached:
+            token_cache.clear()
+        get_current_user(credentials)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=50_000)
+    args = parser.parse_args()
+
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_access_token(1, "user"))
+    uncached = measure(args.iterations, credentials, cached=False)
+    cached = measure(args.iterations, credentials, cached=True)
+
+    print(f"jwt.decode every request: {uncached:8.2f} us/request")
+    print(f"verified-token cache:     {cached:8.2f} us/request")
+    print(f"speedup:                  {uncached / cached:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+# Нагрузочный бенчмарк горячих сценариев магазина.
+#
+# Гоняет настоящее FastAPI-приложение через ASGI (или живой uvicorn через --url)
+# на засеянной локальной БД, печатает throughput и p50/p95/p99 по каждому запросу,
+# пишет результаты в JSON и сравнивает их с сохранённым baseline.
+#
+#   python -m benchmarks.load --output results.json
+#   python -m benchmarks.load --output results.json --save-baseline benchmarks/baseline.json
+#   python -m benchmarks.load --baseline benchmarks/baseline.json   # код возврата 1 при регрессии
+#
+# По умолчанию используется временная SQLite-база; DATABASE_URL из окружения имеет приоритет.
+# С --url сервер должен смотреть в ту же БД, что и бенчмарк (он её засевает), либо укажите --no-seed.
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+_TMP_DIR = tempfile.mkdtemp(prefix="shop-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_TMP_DIR}/bench.db")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret-key-with-enough-length")
+os.environ.setdefault("RATE_LIMITS", "{}")  # все воркеры бенчмарка приходят с одного IP
+
+try:
+    import httpx
+except ImportError:
+    sys.exit("benchmarks.load requires httpx: pip install httpx")
+
+from sqlalchemy import insert
+
+from app.core.database import async_session
+from app.core.security import hash_password
+from app.models.product import Product
+from app.models.user import User
+
+WORDS = ("chair", "table", "lamp", "sofa", "desk", "shelf", "bed", "mirror", "rug", "stool")
+PASSWORD = "bench-password"
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[name].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+
+async def seed(products: int, users: int) -> None:
+    hashed = hash_password(PASSWORD)  # один хэш на всех, чтобы сидинг не занимал минуты
+    async with async_session() as session:
+        await session.execute(
+            insert(Product),
+            [
+                {
+                    "name": f"{WORDS[i % len(WORDS)]} {i}",
+                    "description": f"{random.choice(WORDS)} {random.choice(WORDS)} for home and office",
+                    "price": 10 + i % 500,
+                    "quantity": 1_000_000,
+                    "is_active": True,
+                }
+                for i in range(products)
+            ],
+        )
+        await session.execute(
+            insert(User),
+            [{"email": f"bench{i}@example.com", "hashed_password": hashed, "role": "user"} for i in range(users)],
+        )
+        await session.commit()
+
+
+async def login(client: httpx.AsyncClient, worker: int) -> dict:
+    response = await client.post("/auth/login", json={"email": f"bench{worker}@example.com", "password": PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def scenario_browse(client, rec: Recorder, headers: dict, products: int, worker: int):
+    page = await rec.call(client, "GET /products/", "GET", "/products/")
+    cursor = page.json().get("next_cursor") if page.status_code == 200 else None
+    if cursor:
+        await rec.call(client, "GET /products/?cursor", "GET", "/products/", params={"cursor": cursor})
+    await rec.call(client, "GET /products/search", "GET", "/products/search", params={"q": random.choice(WORDS)})
+    await rec.call(client, "GET /products/{id}", "GET", f"/products/{random.randint(1, products)}")
+
+
+async def scenario_login(client, rec: Recorder, headers: dict, products: int, worker: int):
+    await rec.call(client, "POST /auth/login", "POST", "/auth/login",
+                   json={"email": f"bench{worker}@example.com", "password": PASSWORD})
+
+
+async def scenario_cart(client, rec: Recorder, headers: dict, products: int, worker: int):
+    product_id = random.randint(1, products)
+    await rec.call(client, "POST /cart/items", "POST", "/cart/items",
+                   json={"product_id": product_id, "quantity": 1}, headers=headers)
+    cart = await rec.call(client, "GET /cart/", "GET", "/cart/", headers=headers)
+    items = cart.json().get("items", []) if cart.status_code == 200 else []
+    if items:
+        item_id = items[0]["id"]
+        await rec.call(client, "PUT /cart/items/{id}", "PUT", f"/cart/items/{item_id}",
+                       json={"quantity": 2}, headers=headers)
+        await rec.call(client, "DELETE /cart/items/{id}", "DELETE", f"/cart/items/{item_id}", headers=headers)
+
+
+async def _place_order(client, rec: Recorder, headers: dict, products: int) -> int | None:
+    for product_id in random.sample(range(1, products + 1), k=min(3, products)):
+        await rec.call(client, "POST /cart/items", "POST", "/cart/items",
+                       json={"product_id": product_id, "quantity": 1}, headers=headers)
+    order = await rec.call(client, "POST /orders/", "POST", "/orders/", headers=headers)
+    return order.json()["id"] if order.status_code == 200 else None
+
+
+async def scenario_checkout(client, rec: Recorder, headers: dict, products: int, worker: int):
+    await _place_order(client, rec, headers, products)
+
+
+async def scenario_pay_cancel(client, rec: Recorder, headers: dict, products: int, worker: int):
+    order_id = await _place_order(client, rec, headers, products)
+    if order_id is None:
+        return
+    if random.random() < 0.5:
+        await rec.call(client, "POST /orders/{id}/pay", "POST", f"/orders/{order_id}/pay", headers=headers)
+    else:
+        await rec.call(client, "POST /orders/{id}/cancel", "POST", f"/orders/{order_id}/cancel", headers=headers)
+
+
+SCENARIO_FUNCS = {
+    "browse": scenario_browse,
+    "login": scenario_login,
+    "cart": scenario_cart,
+    "checkout": scenario_checkout,
+    "pay_cancel": scenario_pay_cancel,
+}
+# сценарии, которым нужен токен; логин (bcrypt) делается до старта замера
+AUTHENTICATED = {"cart", "checkout", "pay_cancel"}
+
+
+async def run_scenario(client, name: str, iterations: int, concurrency: int, products: int) -> dict:
+    rec = Recorder()
+    scenario = SCENARIO_FUNCS[name]
+    remaining = iterations
+
+    if name in AUTHENTICATED:
+        auth = await asyncio.gather(*(login(client, i) for i in range(concurrency)))
+    else:
+        auth = [{} for _ in range(concurrency)]
+
+    async def worker(index: int):
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await scenario(client, rec, auth[index], products, index)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 4),
+        "ops_per_second": round(iterations / elapsed, 2),
+        "requests": {
+            request: summarize(values, rec.errors.get(request, 0), elapsed)
+            for request, values in sorted(rec.latencies.items())
+        },
+    }
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    # nearest-rank
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(values: list[float], errors: int, elapsed: float) -> dict:
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "rps": round(len(values) / elapsed, 2),
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    # регрессия: p95 вырос или throughput упал больше чем на tolerance
+    regressions = []
+    for scenario, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(scenario)
+        if not previous:
+            continue
+        if current["ops_per_second"] < previous["ops_per_second"] * (1 - tolerance):
+            regressions.append(
+                f"{scenario}: throughput {previous['ops_per_second']} -> {current['ops_per_second']} ops/s"
+            )
+        for request, stats in current["requests"].items():
+            old = previous["requests"].get(request)
+            if old and stats["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{scenario} {request}: p95 {old['p95_ms']} -> {stats['p95_ms']} ms")
+    return regressions
+
+
+def print_report(results: dict) -> None:
+    header = f"{'scenario':<11} {'request':<28} {'count':>6} {'err':>4} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for scenario, data in results["scenarios"].items():
+        for request, stats in data["requests"].items():
+            print(f"{scenario:<11} {request:<28} {stats['count']:>6} {stats['errors']:>4} {stats['rps']:>9} "
+                  f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}")
+        print(f"{scenario:<11} {'= ops/s':<28} {data['ops_per_second']:>41}")
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test the shop API")
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process ASGI app")
+    parser.add_argument("--scenarios", default=",".join(SCENARIO_FUNCS))
+    parser.add_argument("--iterations", type=int, default=200, help="operations per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--no-seed", action="store_true", help="database is already seeded")
+    parser.add_argument("--output", help="write machine-readable results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a stored results file")
+    parser.add_argument("--save-baseline", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIO_FUNCS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    from app.main import app
+
+    results = {
+        "target": args.url or "asgi",
+        "database": os.environ["DATABASE_URL"].split("@")[-1],
+        "scenarios": {},
+    }
+    async with app.router.lifespan_context(app):
+        if not args.no_seed:
+            await seed(args.products, args.concurrency)
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=60)
+        else:
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+        async with client:
+            for name in scenarios:
+                results["scenarios"][name] = await run_scenario(
+                    client, name, args.iterations, args.concurrency, args.products
+                )
+
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS:")
+            for line in regressions:
+                print("  " + line)
+            return 1
+        print("\nno regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,292 @@
+# Регрессионная проверка планов запросов репозиториев.
+#
+# Засевает базу, вызывает методы репозиториев и для каждого отправленного ими SELECT/UPDATE/DELETE
+# снимает план в том же соединении и с теми же параметрами: EXPLAIN QUERY PLAN в SQLite,
+# EXPLAIN (FORMAT JSON) с enable_seqscan=off в Postgres. Полный проход по таблице
+# (SCAN без частичного индекса в SQLite, Seq Scan в Postgres) - ошибка, если он не в ALLOWED_SCANS.
+#
+#   python -m benchmarks.query_plans             # код возврата 1, если запрос сканирует таблицу
+#   python -m benchmarks.query_plans --verbose   # SQL и планы всех запросов
+#
+# По умолчанию используется временная SQLite-база со схемой из миграций; DATABASE_URL из окружения
+# имеет приоритет и должен указывать на пустую тестовую базу: скрипт её мигрирует и засевает.
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+
+_TMP_DIR = tempfile.mkdtemp(prefix="shop-plans-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_TMP_DIR}/plans.db")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret-key-with-enough-length")
+
+from sqlalchemy import event, insert
+
+from app.core.database import Base, async_session, engine
+from app.core.kv import create_kv_store
+from app.core.migrations import upgrade_database
+from app.models.product import Product
+from app.models.user import User
+from app.repositories.admin_repo import OrderService
+from app.repositories.analytics_repo import SalesRepo
+from app.repositories.cart_repo import CartRepo
+from app.repositories.kv_cart_repo import KVCartRepo
+from app.repositories.order_repo import OrderRepo
+from app.repositories.outbox_repo import OutboxRepo
+from app.repositories.product_repo import ProductRepo
+from app.repositories.user_repo import UserRepo
+
+# (сценарий, таблица) -> почему полный проход здесь допустим
+ALLOWED_SCANS = {
+    ("users.list_users", "users"): "админский список с OFFSET читает таблицу по порядку",
+    ("analytics.daily", "sales_daily"): "сводная таблица: строка на день и статус",
+    ("analytics.by_product", "product_sales"): "сводная таблица, сортировка по вычисленной выручке",
+    ("outbox.counts", "outbox_events"): "счётчики по статусам для админки, проход по покрывающему индексу",
+}
+
+EXPLAINED = ("SELECT", "UPDATE", "DELETE", "WITH")
+SQLITE_SCAN = re.compile(r"^SCAN (?P<table>\w+)(?P<rest>.*)$")
+
+
+class PlanRecorder:
+    # снимает план каждого запроса текущего сценария до его выполнения
+    def __init__(self, dialect: str):
+        self.dialect = dialect
+        self.scenario: str | None = None
+        self.plans: dict[tuple[str, str], list[str]] = {}
+        self.violations: dict[tuple[str, str], list[str]] = {}
+        self.tables = set(Base.metadata.tables)
+        self.partial_indexes = {
+            index.name
+            for table in Base.metadata.tables.values()
+            for index in table.indexes
+            if index.dialect_options["sqlite"]["where"] is not None
+        }
+
+    def attach(self, engine) -> None:
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before_execute)
+
+    def detach(self, engine) -> None:
+        event.remove(engine.sync_engine, "before_cursor_execute", self._before_execute)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.scenario is None or executemany or not statement.lstrip().upper().startswith(EXPLAINED):
+            return
+        key = (self.scenario, statement)
+        if key in self.plans:
+            return
+        explain_cursor = conn.connection.cursor()
+        try:
+            if self.dialect == "postgresql":
+                lines, scans = self._explain_postgres(explain_cursor, statement, parameters)
+            else:
+                lines, scans = self._explain_sqlite(explain_cursor, statement, parameters)
+        finally:
+            explain_cursor.close()
+        self.plans[key] = lines
+        violations = [table for table in scans if (self.scenario, table) not in ALLOWED_SCANS]
+        if violations:
+            self.violations[key] = violations
+
+    def _explain_sqlite(self, cursor, statement, parameters):
+        cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+        lines, scans = [], []
+        for row in cursor.fetchall():
+            detail = row[-1]
+            lines.append(detail)
+            match = SQLITE_SCAN.match(detail)
+            if match is None or match["table"] not in self.tables:
+                continue  # SEARCH по индексу, подзапросы, временные B-tree
+            rest = match["rest"]
+            if "VIRTUAL TABLE" in rest:
+                continue  # FTS5 ищет по своему индексу
+            index = re.search(r"USING (?:COVERING )?INDEX (\w+)", rest)
+            if index is not None and index[1] in self.partial_indexes:
+                continue  # проход по частичному индексу затрагивает только нужные строки
+            scans.append(match["table"])
+        return lines, scans
+
+    def _explain_postgres(self, cursor, statement, parameters):
+        # с выключенным seqscan планировщик выбирает Seq Scan, только когда подходящего индекса нет:
+        # проверка не зависит от объёма тестовых данных и статистики
+        cursor.execute("SET enable_seqscan = off")
+        try:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+            plan = cursor.fetchone()[0]
+        finally:
+            cursor.execute("RESET enable_seqscan")
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        lines, scans = [], []
+
+        def walk(node, depth):
+            relation = node.get("Relation Name")
+            lines.append("  " * depth + node["Node Type"] + (f" on {relation}" if relation else ""))
+            if node["Node Type"] == "Seq Scan" and relation in self.tables:
+                scans.append(relation)
+            for child in node.get("Plans", []):
+                walk(child, depth + 1)
+
+        walk(plan[0]["Plan"], 0)
+        return lines, scans
+
+
+async def seed(products: int, users: int) -> tuple[list[int], list[int]]:
+    # возвращает id созданных товаров и пользователей: база может быть не пустой (тесты)
+    async with async_session() as session:
+        product_ids = await session.scalars(
+            insert(Product).returning(Product.id, sort_by_parameter_order=True),
+            [
+                {
+                    "name": f"chair {i}" if i % 2 else f"table {i}",
+                    "description": "solid oak, for home and office",
+                    "price": 10 + i,
+                    "quantity": 1_000,
+                    "is_active": i % 10 != 0,  # часть товаров снята с продажи
+                }
+                for i in range(1, products + 1)
+            ],
+        )
+        user_ids = await session.scalars(
+            insert(User).returning(User.id, sort_by_parameter_order=True),
+            [{"email": f"plans{i}@example.com", "hashed_password": "x", "role": "user"} for i in range(users)],
+        )
+        ids = list(product_ids), list(user_ids)
+        await session.commit()
+    return ids
+
+
+async def run_scenarios(recorder: PlanRecorder, user_id: int, product_ids: list[int]) -> None:
+    # product_ids - активные товары
+    now = datetime.now(timezone.utc)
+    state = {}
+
+    async def fill_cart(db):
+        repo = CartRepo(db)
+        cart_id = await repo.get_cart_id(user_id)
+        for product_id in product_ids:
+            product = await ProductRepo(db).get_product_by_id(product_id)
+            await repo.add_item(cart_id, product, 1)
+
+    async def place_order(db):
+        cart = await CartRepo(db).get_or_create_cart(user_id)
+        order = await OrderRepo(db).create_order_from_cart(user_id, cart)
+        await db.commit()
+        return order.id
+
+    async def create_order(db):
+        state["paid"] = await place_order(db)
+
+    async def cart_item_ops(db):
+        repo = CartRepo(db)
+        item = await repo.get_item(await repo.get_cart_id(user_id), product_ids[0])
+        await repo.update_item(user_id, item.id, 2)
+        await repo.remove_item(user_id, item.id)
+
+    async def kv_cart(db):
+        repo = KVCartRepo(db, create_kv_store("memory"))
+        cart_id = await repo.get_cart_id(user_id)
+        await repo.add_item(cart_id, await ProductRepo(db).get_product_by_id(product_ids[0]), 1)
+        await repo.get_or_create_cart(user_id)
+
+    async def cancel_order(db):
+        await fill_cart(db)
+        await db.commit()
+        state["cancelled"] = await place_order(db)
+        await OrderRepo(db).cancel_order(state["cancelled"], user_id)
+
+    async def change_status(db):
+        await OrderService(OrderRepo(db)).change_order_status(state["paid"], "shipped")
+
+    async def outbox_claim(db):
+        repo = OutboxRepo(db)
+        events = await repo.claim(10, 30.0)
+        await repo.mark_done([events[0]["id"]])
+        await repo.mark_failed(events[1]["id"], "boom", retry_in=1.0)
+
+    scenarios = [
+        ("users.get_by_email", lambda db: UserRepo(db).get_by_email("plans1@example.com")),
+        ("users.get_by_id", lambda db: UserRepo(db).get_by_id(user_id)),
+        ("users.list_users", lambda db: UserRepo(db).list_users(0, 50)),
+        ("products.get_product_by_id", lambda db: ProductRepo(db).get_product_by_id(product_ids[0])),
+        ("products.list_active_products", lambda db: ProductRepo(db).list_active_products(20)),
+        ("products.list_active_product_rows", lambda db: ProductRepo(db).list_active_product_rows(20, 40)),
+        ("products.search_products", lambda db: ProductRepo(db).search_products("chair oak", 20, (0.0, 10))),
+        ("products.upsert_products", lambda db: ProductRepo(db).upsert_products(
+            [{"name": "chair 1", "description": "updated", "price": 11, "quantity": 5, "image_url": None}])),
+        ("cart.fill", fill_cart),
+        ("cart.get_or_create_cart", lambda db: CartRepo(db).get_or_create_cart(user_id)),
+        ("cart.item_ops", cart_item_ops),
+        ("orders.create_order_from_cart", create_order),
+        ("orders.pay_order", lambda db: OrderRepo(db).pay_order(state["paid"], user_id)),
+        ("orders.cancel_order", cancel_order),
+        ("orders.change_order_status", change_status),
+        ("orders.list_order_summaries", lambda db: OrderRepo(db).list_order_summaries(
+            user_id, 20)),
+        ("orders.list_order_summaries_filtered", lambda db: OrderRepo(db).list_order_summaries(
+            user_id, 20, after_id=100, statuses=["paid", "shipped"], created_from=now - timedelta(days=30))),
+        ("orders.list_orders_by_user", lambda db: OrderRepo(db).list_orders_by_user(
+            user_id, 20, statuses=["pending"], created_to=now + timedelta(days=1))),
+        ("orders.get_user_order", lambda db: OrderRepo(db).get_user_order(state["paid"], user_id)),
+        ("orders.get_order_history", lambda db: OrderRepo(db).get_order_history(state["paid"], user_id)),
+        ("products.is_used_in_orders", lambda db: ProductRepo(db).is_used_in_orders(product_ids[0])),
+        ("cart.clear_cart", lambda db: CartRepo(db).clear_cart(user_id)),
+        ("cart.kv_store", kv_cart),
+        ("analytics.daily", lambda db: SalesRepo(db).daily(date.today() - timedelta(days=7), None, ["paid"])),
+        ("analytics.by_product", lambda db: SalesRepo(db).by_product(["paid"], 10)),
+        ("outbox.claim", outbox_claim),
+        ("outbox.counts", lambda db: OutboxRepo(db).counts()),
+    ]
+    for name, scenario in scenarios:
+        recorder.scenario = name
+        async with async_session() as db:
+            await scenario(db)
+        recorder.scenario = None
+
+
+def print_report(recorder: PlanRecorder, verbose: bool) -> None:
+    scenarios = dict.fromkeys(scenario for scenario, _ in recorder.plans)
+    for scenario in scenarios:
+        keys = [key for key in recorder.plans if key[0] == scenario]
+        failed = [key for key in keys if key in recorder.violations]
+        print(f"{'FAIL' if failed else 'ok':4}  {scenario:36} {len(keys)} queries")
+        for key in keys:
+            if verbose or key in recorder.violations:
+                if key in recorder.violations:
+                    print(f"      full scan of {', '.join(recorder.violations[key])}:")
+                print("      " + " ".join(key[1].split()))
+                for line in recorder.plans[key]:
+                    print("        " + line)
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Fail if a repository query falls back to a full table scan")
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--verbose", action="store_true", help="print every query with its plan")
+    args = parser.parse_args()
+
+    await upgrade_database()
+    product_ids, user_ids = await seed(args.products, args.users)
+    async with async_session() as db:
+        await OutboxRepo(db).add("plans.check", {"n": 1})  # у claim должно быть что забрать
+        await db.commit()
+
+    recorder = PlanRecorder(engine.dialect.name)
+    recorder.attach(engine)
+    await run_scenarios(recorder, user_ids[0], product_ids[:5:2])
+    await engine.dispose()
+
+    print_report(recorder, args.verbose)
+    if recorder.violations:
+        print(f"\n{len(recorder.violations)} queries scan whole tables; add an index or extend ALLOWED_SCANS")
+        return 1
+    print(f"\nall {len(recorder.plans)} queries use indexes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,98 @@
+# Микробенчмарк сериализации больших списков: стандартный путь FastAPI
+# (ORM-объекты -> повторная валидация через response_model -> stdlib json)
+# против быстрого (строки/dict -> FastJSONResponse с orjson).
+#
+#   python -m benchmarks.serialization [--items 10000] [--rounds 20]
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///./bench.db")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret-key-with-enough-length")
+
+try:
+    import httpx
+except ImportError:
+    sys.exit("benchmarks.serialization requires httpx: pip install httpx")
+
+from fastapi import FastAPI
+
+from app.api.orders import _summary_dict
+from app.api.products import _product_dict
+from app.core.responses import FastJSONResponse, orjson
+from app.models.product import Product
+from app.schemas.order import OrderSummary
+from app.schemas.product import ProductRead
+
+
+def make_products(count: int) -> list[Product]:
+    return [
+        Product(id=i, name=f"product {i}", description=f"description of product {i} " * 3,
+                price=100 + i % 900, quantity=i % 50, is_active=True, image_url=f"/media/{i}.webp")
+        for i in range(1, count + 1)
+    ]
+
+
+def make_summaries(count: int) -> list[dict]:
+    created = datetime(2024, 1, 1, 12, 30, tzinfo=timezone.utc)
+    return [
+        {"id": i, "user_id": 1, "status": "paid", "created_at": created, "item_count": i % 7 + 1,
+         "total_price": 150.5 + i}
+        for i in range(count, 0, -1)
+    ]
+
+
+def build_app(products: list[Product], summaries: list[dict]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/standard/products", response_model=list[ProductRead])
+    async def standard_products():
+        return products
+
+    @app.get("/fast/products")
+    async def fast_products():
+        return FastJSONResponse([_product_dict(p) for p in products])
+
+    @app.get("/standard/orders", response_model=list[OrderSummary])
+    async def standard_orders():
+        return summaries
+
+    @app.get("/fast/orders")
+    async def fast_orders():
+        return FastJSONResponse([_summary_dict(row) for row in summaries])
+
+    return app
+
+
+async def measure(client: httpx.AsyncClient, url: str, rounds: int) -> tuple[float, bytes]:
+    body = (await client.get(url)).content  # прогрев
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await client.get(url)
+    return (time.perf_counter() - start) / rounds * 1000, body
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    app = build_app(make_products(args.items), make_summaries(args.items))
+    transport = httpx.ASGITransport(app=app)
+    print(f"{args.items} items per response, {args.rounds} rounds, orjson {'on' if orjson else 'missing'}")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for resource in ("products", "orders"):
+            standard_ms, standard_body = await measure(client, f"/standard/{resource}", args.rounds)
+            fast_ms, fast_body = await measure(client, f"/fast/{resource}", args.rounds)
+            same = json.loads(standard_body) == json.loads(fast_body)
+            print(f"{resource:<9} standard {standard_ms:9.2f} ms   fast {fast_ms:9.2f} ms   "
+                  f"speedup {standard_ms / fast_ms:5.1f}x   same payload: {same}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
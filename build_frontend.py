@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+
+from app.core.compression import brotli, brotli_bytes, gzip_bytes
+
+SOURCE = "frontend"
+OUTPUT = os.path.join(SOURCE, "dist")
+
+HASHED_EXTENSIONS = (".css", ".js")  # html остаётся под своим именем: на него ведут ссылки
+COMPRESSED_EXTENSIONS = (".html", ".css", ".js", ".svg", ".json", ".txt")
+MIN_COMPRESS_SIZE = 256
+
+ASSET_REF = re.compile(r'(?P<attr>(?:src|href)=["\'])(?P<path>[^"\'#?]+)(?P<end>["\'])')
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=5).hexdigest()
+
+
+def source_files():
+    for root, dirs, files in os.walk(SOURCE):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != OUTPUT]
+        for name in files:
+            path = os.path.join(root, name)
+            yield os.path.relpath(path, SOURCE).replace(os.sep, "/")
+
+
+def write(relpath: str, data: bytes) -> None:
+    path = os.path.join(OUTPUT, relpath)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    if relpath.endswith(COMPRESSED_EXTENSIONS) and len(data) >= MIN_COMPRESS_SIZE:
+        with open(path + ".gz", "wb") as f:
+            f.write(gzip_bytes(data))
+        compressed = brotli_bytes(data)
+        if compressed is not None:
+            with open(path + ".br", "wb") as f:
+                f.write(compressed)
+
+
+def build_frontend():
+    shutil.rmtree(OUTPUT, ignore_errors=True)
+    files = sorted(source_files())
+
+    # style.css -> style.3f9a1c2b7d.css: при изменении содержимого меняется имя,
+    # поэтому такие файлы можно кэшировать как immutable
+    manifest = {}
+    for relpath in files:
+        if relpath.endswith(HASHED_EXTENSIONS):
+            with open(os.path.join(SOURCE, relpath), "rb") as f:
+                data = f.read()
+            stem, ext = os.path.splitext(relpath)
+            manifest[relpath] = f"{stem}.{content_hash(data)}{ext}"
+            write(manifest[relpath], data)
+
+    def rewrite(match):
+        path = manifest.get(match["path"], match["path"])
+        return match["attr"] + path + match["end"]
+
+    for relpath in files:
+        if relpath in manifest:
+            continue
+        with open(os.path.join(SOURCE, relpath), "rb") as f:
+            data = f.read()
+        if relpath.endswith(".html"):
+            data = ASSET_REF.sub(rewrite, data.decode("utf-8")).encode("utf-8")
+        write(relpath, data)
+
+    with open(os.path.join(OUTPUT, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print(f"Frontend built into {OUTPUT}: {len(files)} files, {len(manifest)} hashed"
+          + ("" if brotli else " (brotli not installed, .br skipped)"))
+
+
+if __name__ == "__main__":
+    sys.exit(build_frontend())
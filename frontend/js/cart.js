@@ -182,5 +182,22 @@ window.addEventListener("click", (e) => {
   if (e.target === paymentModal) paymentModal.style.display = "none";
 });
 
+// ===== Статусы заказов в реальном времени (SSE) =====
+const ORDER_STATUS_LABELS = { pending: "ожидает оплаты", paid: "оплачен", shipped: "отправлен", cancelled: "отменён" };
+
+function subscribeOrderUpdates() {
+  const token = localStorage.getItem("token");
+  if (!token || !window.EventSource) return;
+  // EventSource не передаёт заголовки, поэтому токен идёт в query; переподключается браузер сам
+  const source = new EventSource(`http://127.0.0.1:8000/orders/stream?token=${encodeURIComponent(token)}`);
+  source.addEventListener("order_status", (e) => {
+    const event = JSON.parse(e.data);
+    if (!event.from_status) return; // о только что созданном заказе пользователь уже знает
+    showToast(`Заказ #${event.order_id}: ${ORDER_STATUS_LABELS[event.status] || event.status}`);
+  });
+  window.addEventListener("beforeunload", () => source.close());
+}
+
 // ===== INIT =====
 loadCart();
+subscribeOrderUpdates();
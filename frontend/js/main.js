@@ -12,6 +12,9 @@ document.addEventListener("DOMContentLoaded", () => {
   // === DOM ELEMENTS ===
   const productsContainer = document.getElementById("products");
   const searchInput = document.getElementById("searchInput");
+  const loadMoreBtn = document.getElementById("load-more-btn");
+  // url следующей страницы каталога/поиска (курсорная пагинация)
+  let nextPageUrl = null;
 
   // Auth buttons
   const loginBtn = document.getElementById("login-btn");
@@ -132,16 +135,40 @@ document.addEventListener("DOMContentLoaded", () => {
     try {
       const res = await fetch(`${API_URL}/products/`);
       if (!res.ok) throw new Error("Ошибка загрузки товаров");
-      const products = await res.json();
-      displayProducts(products);
+      const page = await res.json();
+      setNextPage(`${API_URL}/products/`, page.next_cursor);
+      displayProducts(page.items);
     } catch (err) {
       productsContainer.innerHTML = `<p>${err.message}</p>`;
     }
   }
 
-  function displayProducts(products) {
-    productsContainer.innerHTML = "";
-    if (!products || !products.length) {
+  function setNextPage(baseUrl, cursor) {
+    if (cursor) {
+      const sep = baseUrl.includes("?") ? "&" : "?";
+      nextPageUrl = `${baseUrl}${sep}cursor=${encodeURIComponent(cursor)}`;
+    } else {
+      nextPageUrl = null;
+    }
+    if (loadMoreBtn) loadMoreBtn.style.display = nextPageUrl ? "block" : "none";
+  }
+
+  loadMoreBtn?.addEventListener("click", async () => {
+    if (!nextPageUrl) return;
+    try {
+      const res = await fetch(nextPageUrl);
+      if (!res.ok) throw new Error("Ошибка загрузки товаров");
+      const page = await res.json();
+      setNextPage(nextPageUrl.replace(/[?&]cursor=[^&]*/, ""), page.next_cursor);
+      displayProducts(page.items, true);
+    } catch (err) {
+      showToast(err.message, "#dc2626");
+    }
+  });
+
+  function displayProducts(products, append = false) {
+    if (!append) productsContainer.innerHTML = "";
+    if (!append && (!products || !products.length)) {
       productsContainer.innerHTML = "<p>Товары отсутствуют</p>";
       return;
     }
@@ -150,7 +177,7 @@ document.addEventListener("DOMContentLoaded", () => {
       const card = document.createElement("div");
       card.className = "product-card";
       card.innerHTML = `
-        <img src="${p.image ? `images/${p.image}` : 'assets/images/default.png'}" alt="${p.name}">
+        <img src="${p.thumbnails ? `${API_URL}${p.thumbnails.list}` : 'assets/images/default.png'}" alt="${p.name}" loading="lazy">
         <div class="info">
           <h3>${p.name}</h3>
           <p>${p.price} ₽</p>
@@ -171,10 +198,12 @@ document.addEventListener("DOMContentLoaded", () => {
 
   async function searchProducts(query) {
     try {
-      const res = await fetch(`${API_URL}/products/search?q=${encodeURIComponent(query)}`);
+      const url = `${API_URL}/products/search?q=${encodeURIComponent(query)}`;
+      const res = await fetch(url);
       if (!res.ok) throw new Error("Ошибка поиска");
-      const products = await res.json();
-      displayProducts(products);
+      const page = await res.json();
+      setNextPage(url, page.next_cursor);
+      displayProducts(page.items);
     } catch (err) {
       console.error(err);
     }
@@ -211,13 +240,14 @@ document.addEventListener("DOMContentLoaded", () => {
         headers: { "Authorization": `Bearer ${token}` }
       });
       if (!res.ok) throw { status: res.status, message: "Ошибка загрузки заказов" };
-      const orders = await res.json();
+      const page = await res.json();
+      const orders = page.items;
 
       ordersList.innerHTML = "";
       if (orders && orders.length) {
         orders.forEach(o => {
           const li = document.createElement("li");
-          li.innerHTML = `<strong>Заказ #${o.id}</strong> — ${o.status.toUpperCase()} — ${o.items.length} товаров — ${o.total_price} ₽`;
+          li.innerHTML = `<strong>Заказ #${o.id}</strong> — ${o.status.toUpperCase()} — ${o.item_count} товаров — ${o.total_price} ₽`;
           ordersList.appendChild(li);
         });
       } else {
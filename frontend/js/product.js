@@ -9,7 +9,7 @@ async function loadProduct() {
 
     container.innerHTML = `
         <div class="product-card" style="max-width:400px;margin:2rem auto;">
-            <img src="${product.image_url || 'https://via.placeholder.com/300'}">
+            <img src="${product.thumbnails ? `${API_URL}${product.thumbnails.detail}` : (product.image_url || 'https://via.placeholder.com/300')}">
             <div class="info">
                 <h3>${product.name}</h3>
                 <p>${product.price} ₽</p>
@@ -1,9 +1,8 @@
 import asyncio
-from app.core.database import engine, Base
+from app.core.migrations import upgrade_database
 
 async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await upgrade_database()
     print('DB initialized')
 
 if __name__ == "__main__":
@@ -0,0 +1,79 @@
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.database import Base
+# регистрируем все таблицы в Base.metadata для autogenerate
+from app.models import analytics, cart, order, outbox, product, user  # noqa: F401
+
+config = context.config
+
+# при запуске из приложения (app.core.migrations) логирование уже настроено
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# объекты полнотекстового поиска создаются сырым DDL в 0002 и в моделях не описаны
+SEARCH_OBJECTS = {"search_vector", "ix_products_search_vector", "ix_products_name_trgm"}
+
+
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    if reflected and compare_to is None:
+        return not (name in SEARCH_OBJECTS or name.startswith("products_fts"))
+    return True
+
+
+def database_url() -> str:
+    return config.get_main_option("sqlalchemy.url") or settings.DATABASE_URL
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=database_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
+        include_object=include_object,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection) -> None:
+    # batch-режим нужен SQLite: ALTER TABLE там почти ничего не умеет
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=True,
+        include_object=include_object,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    engine = create_async_engine(database_url(), poolclass=NullPool)
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+
+def run_migrations_online() -> None:
+    # приложение передаёт своё соединение, CLI создаёт отдельный движок
+    connection = config.attributes.get("connection")
+    if connection is None:
+        asyncio.run(run_async_migrations())
+    else:
+        do_run_migrations(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,66 @@
+"""product search
+
+Полнотекстовый индекс товаров живёт вне ORM-модели и поддерживается самой БД, поэтому остаётся
+актуальным при любых insert/update в products. Индекс сразу заполняется по уже существующим товарам.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 20:49:30.000000
+"""
+from alembic import op
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+# Полнотекстовый поиск по товарам.
+# Postgres: generated-колонка tsvector + GIN, плюс pg_trgm для нечёткого поиска по имени.
+POSTGRES_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING GIN (name gin_trgm_ops)",
+]
+
+# SQLite: external-content FTS5 таблица, синхронизируется триггерами
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    "name, description, content='products', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "INSERT INTO products_fts(products_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for stmt in POSTGRES_SEARCH_DDL:
+            op.execute(stmt)
+    elif dialect == 'sqlite':
+        for stmt in SQLITE_SEARCH_DDL:
+            op.execute(stmt)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_products_name_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_products_search_vector")
+        op.execute("ALTER TABLE products DROP COLUMN IF EXISTS search_vector")
+    elif dialect == 'sqlite':
+        for trigger in ('products_fts_ai', 'products_fts_ad', 'products_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS products_fts")
@@ -0,0 +1,57 @@
+"""sales analytics
+
+Время создания заказа и сводные таблицы продаж. Существующие заказы получают created_at
+на момент миграции; сводки по ним пересчитывает python backfill_analytics.py.
+Сводные таблицы могли уже появиться от create_all до перехода на миграции: колонки create_all
+не добавлял, а новые таблицы создавал.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 20:49:45.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # SQLite не добавляет колонку с непостоянным DEFAULT через ALTER TABLE: таблица пересоздаётся
+    recreate = 'always' if bind.dialect.name == 'sqlite' else 'auto'
+    with op.batch_alter_table('orders', recreate=recreate) as batch_op:
+        batch_op.add_column(
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False)
+        )
+
+    tables = sa.inspect(bind).get_table_names()
+    if 'sales_daily' not in tables:
+        op.create_table('sales_daily',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('orders', sa.Integer(), nullable=False),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'status')
+        )
+    if 'product_sales' not in tables:
+        op.create_table('product_sales',
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('orders', sa.Integer(), nullable=False),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+        sa.PrimaryKeyConstraint('product_id', 'status')
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('product_sales')
+    op.drop_table('sales_daily')
+    with op.batch_alter_table('orders') as batch_op:
+        batch_op.drop_column('created_at')
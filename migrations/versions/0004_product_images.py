@@ -0,0 +1,25 @@
+"""product images
+
+Ключ загруженной картинки товара (файл в MEDIA_DIR).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 20:50:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('products', sa.Column('image_key', sa.String(length=80), nullable=True))
+
+
+def downgrade() -> None:
+    # без пересоздания таблицы: оно потеряло бы триггеры полнотекстового индекса
+    op.drop_column('products', 'image_key')
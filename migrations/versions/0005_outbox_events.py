@@ -0,0 +1,39 @@
+"""outbox events
+
+Таблица transactional outbox. Как и сводные таблицы продаж, могла уже появиться от create_all.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 20:50:15.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table('outbox_events'):
+        return
+    op.create_table('outbox_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('topic', sa.String(length=100), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('available_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outbox_events_status_available', 'outbox_events', ['status', 'available_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_events_status_available', table_name='outbox_events')
+    op.drop_table('outbox_events')
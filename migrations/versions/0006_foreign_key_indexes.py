@@ -0,0 +1,38 @@
+"""foreign key indexes
+
+Индексы под выборки по внешним ключам: позиции и история заказа, заказы пользователя,
+проверка is_used_in_orders, плюс частичный индекс активных товаров для каталога.
+cart_items.cart_id отдельного индекса не требует: его покрывает уникальный (cart_id, product_id).
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 21:05:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_orders_user_id_id', 'orders', ['user_id', 'id'], unique=False)
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'], unique=False)
+    op.create_index('ix_order_items_product_id', 'order_items', ['product_id'], unique=False)
+    op.create_index('ix_order_history_order_id', 'order_history', ['order_id'], unique=False)
+    op.create_index(
+        'ix_products_active_id', 'products', ['id'], unique=False,
+        postgresql_where=sa.text('is_active = true'),
+        sqlite_where=sa.text('is_active = 1'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_active_id', table_name='products')
+    op.drop_index('ix_order_history_order_id', table_name='order_history')
+    op.drop_index('ix_order_items_product_id', table_name='order_items')
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
+    op.drop_index('ix_orders_user_id_id', table_name='orders')
@@ -0,0 +1,89 @@
+# Тесты гоняют настоящее приложение через ASGI на временной SQLite-базе со схемой из миграций.
+# Окружение задаётся до импорта app: настройки и движок создаются при импорте
+import os
+import tempfile
+
+_TMP_DIR = tempfile.mkdtemp(prefix="shop-tests-")
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL", f"sqlite+aiosqlite:///{_TMP_DIR}/test.db")
+os.environ.pop("READ_DATABASE_URL", None)
+os.environ.setdefault("JWT_SECRET", "test-secret-key-with-enough-length-for-hs256")
+os.environ["RATE_LIMITS"] = "{}"
+os.environ["CONCURRENCY_LIMIT_ENABLED"] = "false"
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+import asyncio
+import itertools
+
+import httpx
+import pytest
+from sqlalchemy import insert
+
+from app.core.database import async_session, engine
+from app.core.migrations import upgrade_database
+from app.core.security import create_access_token
+from app.main import app
+from app.models.product import Product
+from app.models.user import User
+
+_names = itertools.count(1)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    async def migrate():
+        await upgrade_database()
+        await engine.dispose()
+
+    asyncio.run(migrate())
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+async def dispose_engine(anyio_backend):
+    # у каждого теста свой event loop, соединения aiosqlite к нему привязаны
+    yield
+    await engine.dispose()
+
+
+@pytest.fixture
+async def client(anyio_backend):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def create_users(count: int) -> list[dict]:
+    # пользователи напрямую в БД: регистрация через API тратила бы время на bcrypt
+    prefix = next(_names)
+    async with async_session() as session:
+        result = await session.execute(
+            insert(User).returning(User.id),
+            [{"email": f"user{prefix}-{i}@example.com", "hashed_password": "x", "role": "user"} for i in range(count)],
+        )
+        ids = result.scalars().all()
+        await session.commit()
+    return [{"Authorization": f"Bearer {create_access_token(user_id, 'user')}"} for user_id in ids]
+
+
+async def create_product(quantity: int, price: int = 10) -> int:
+    async with async_session() as session:
+        product_id = await session.scalar(
+            insert(Product)
+            .values(name=f"test product {next(_names)}", price=price, quantity=quantity, is_active=True)
+            .returning(Product.id)
+        )
+        await session.commit()
+    return product_id
+
+
+@pytest.fixture
+def users():
+    return create_users
+
+
+@pytest.fixture
+def product():
+    return create_product
@@ -0,0 +1,20 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_update_item_returns_cart_item_with_product(client, users, product):
+    product_id = await product(quantity=10, price=12)
+    [headers] = await users(1)
+    cart = await client.post("/cart/items", json={"product_id": product_id, "quantity": 1}, headers=headers)
+    [item] = cart.json()["items"]
+
+    response = await client.put(f"/cart/items/{item['id']}", json={"quantity": 3}, headers=headers)
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {**item, "quantity": 3}
+    assert response.json()["product"]["id"] == product_id
+
+    response = await client.put(f"/cart/items/{item['id']}", json={"quantity": 0}, headers=headers)
+    assert (response.status_code, response.json()) == (200, {"detail": "Item removed"})
+    assert (await client.get("/cart/", headers=headers)).json()["items"] == []
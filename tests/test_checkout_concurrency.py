@@ -0,0 +1,27 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from app.core.database import async_session
+from app.models.product import Product
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_checkouts_never_oversell(client, users, product):
+    # остатка хватает на STOCK заказов из BUYERS одновременных: лишние получают 409, в минус не уходим
+    stock, buyers = 5, 20
+    product_id = await product(quantity=stock)
+    headers = await users(buyers)
+    for h in headers:
+        response = await client.post("/cart/items", json={"product_id": product_id, "quantity": 1}, headers=h)
+        assert response.status_code == 200, response.text
+
+    responses = await asyncio.gather(*(client.post("/orders/", headers=h) for h in headers))
+
+    statuses = sorted(r.status_code for r in responses)
+    assert statuses.count(200) == stock
+    assert statuses.count(409) == buyers - stock
+    async with async_session() as session:
+        assert await session.scalar(select(Product.quantity).where(Product.id == product_id)) == 0
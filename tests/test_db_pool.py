@@ -0,0 +1,33 @@
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.database import TimedQueuePool, pool_status
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_only_starved_checkouts_count_as_waits(anyio_backend):
+    path = os.path.join(tempfile.mkdtemp(prefix="shop-pool-"), "pool.db")
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}", poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.1,
+    )
+    try:
+        # открытие нового соединения и выдача свободного - обычная выдача, не ожидание
+        async with engine.connect():
+            pass
+        async with engine.connect():
+            pass
+        assert pool_status(engine)["waits"] == 0
+
+        async with engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                await engine.connect()
+        status = pool_status(engine)
+        assert (status["waits"], status["timeouts"], status["max_overflow"]) == (1, 1, 0)
+        assert status["max_wait_seconds"] >= 0.1
+    finally:
+        await engine.dispose()
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+from starlette.requests import Request
+
+from app.core.idempotency import IdempotencyStore, InMemoryIdempotencyBackend
+
+pytestmark = pytest.mark.anyio
+
+
+class Created(BaseModel):
+    id: int
+
+
+def make_request(path: str = "/orders/") -> Request:
+    return Request({
+        "type": "http", "method": "POST", "path": path, "query_string": b"", "headers": [],
+        "scheme": "http", "server": ("test", 80),
+    })
+
+
+async def test_duplicate_on_another_worker_replays_first_response():
+    # два воркера с общим backend (как с Redis): повтор на втором не выполняет запрос заново
+    backend = InMemoryIdempotencyBackend(maxsize=100, ttl=60, lock_ttl=30)
+    worker_a = IdempotencyStore(backend, wait_timeout=5)
+    worker_b = IdempotencyStore(backend, wait_timeout=5)
+    calls = 0
+
+    async def handler():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.2)
+        return Created(id=calls)
+
+    first, retry = await asyncio.gather(
+        worker_a.run(1, "key-1", make_request(), handler),
+        worker_b.run(1, "key-1", make_request(), handler),
+    )
+
+    assert calls == 1
+    assert first.body == retry.body == b'{"id":1}'
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert worker_b.waited == 1
+
+
+async def test_key_reused_for_other_request_is_rejected():
+    store = IdempotencyStore(InMemoryIdempotencyBackend(maxsize=100, ttl=60, lock_ttl=30), wait_timeout=5)
+
+    async def handler():
+        return Created(id=1)
+
+    await store.run(1, "key-2", make_request("/orders/"), handler)
+    with pytest.raises(HTTPException) as exc:
+        await store.run(1, "key-2", make_request("/orders/1/pay"), handler)
+    assert exc.value.status_code == 422
@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import update
+
+from app.core.database import async_session
+from app.core.kv import InMemoryKV
+from app.models.product import Product
+from app.repositories.kv_cart_repo import KVCartRepo
+
+pytestmark = pytest.mark.anyio
+
+
+class RecordingKV(InMemoryKV):
+    def __init__(self):
+        super().__init__()
+        self.expired: list[str] = []
+
+    async def expire(self, key: str, seconds: int) -> None:
+        self.expired.append(key)
+        await super().expire(key, seconds)
+
+
+async def add(repo: KVCartRepo, db, product_id: int, quantity: int = 1):
+    await repo.add_item(await repo.get_cart_id(1), await db.get(Product, product_id), quantity)
+
+
+async def test_price_is_fixed_when_item_is_added(anyio_backend, product):
+    # как в SQL-корзине: цена позиции - на момент добавления, а не текущая цена товара
+    product_id = await product(quantity=10, price=10)
+    store = RecordingKV()
+    async with async_session() as db:
+        repo = KVCartRepo(db, store)
+        await add(repo, db, product_id)
+        await db.execute(update(Product).where(Product.id == product_id).values(price=25))
+        await db.commit()
+        await add(repo, db, product_id)
+
+        [item] = (await repo.get_or_create_cart(1)).items
+        assert (item.quantity, item.price) == (2, 10)
+        assert await repo.update_item(1, product_id, 5) == {
+            "id": product_id, "product_id": product_id, "quantity": 5, "price": 10.0,
+        }
+
+
+async def test_remove_refreshes_ttl(anyio_backend, product):
+    product_ids = [await product(quantity=10), await product(quantity=10)]
+    store = RecordingKV()
+    async with async_session() as db:
+        repo = KVCartRepo(db, store)
+        for product_id in product_ids:
+            await add(repo, db, product_id)
+        store.expired.clear()
+
+        assert await repo.remove_item(1, product_ids[0])
+        assert store.expired == ["cart:1"]
+        assert [item.product_id for item in (await repo.get_or_create_cart(1)).items] == product_ids[1:]
+
+
+async def test_checkout_keeps_items_added_after_the_cart_was_read(anyio_backend, product):
+    ordered, added_later = await product(quantity=10), await product(quantity=10)
+    async with async_session() as db:
+        repo = KVCartRepo(db, RecordingKV())
+        await add(repo, db, ordered)
+        cart = await repo.get_or_create_cart(1)
+        await add(repo, db, added_later)
+
+        await repo.on_checkout(1, [item.product_id for item in cart.items])
+
+        assert [item.product_id for item in (await repo.get_or_create_cart(1)).items] == [added_later]
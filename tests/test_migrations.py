@@ -0,0 +1,41 @@
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.migrations import upgrade_database
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def legacy_engine(anyio_backend):
+    # отдельная база: общая тестовая уже на head
+    path = os.path.join(tempfile.mkdtemp(prefix="shop-legacy-"), "legacy.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.parametrize("schema_revision", ["0001", "0002", "0004", "0005"])
+async def test_database_created_by_create_all_is_adopted(legacy_engine, schema_revision):
+    # схема одной из версий до миграций без истории - как после create_all, с данными
+    await upgrade_database(legacy_engine, schema_revision)
+    async with legacy_engine.begin() as conn:
+        await conn.execute(text("DROP TABLE alembic_version"))
+        await conn.execute(text(
+            "INSERT INTO products (name, description, price, quantity, is_active) "
+            "VALUES ('legacy chair', 'oak', 10, 1, 1)"
+        ))
+
+    await upgrade_database(legacy_engine)
+
+    async with legacy_engine.connect() as conn:
+        assert await conn.scalar(text("SELECT version_num FROM alembic_version")) == "0006"
+        columns = await conn.run_sync(lambda c: {col["name"] for col in inspect(c).get_columns("products")})
+        assert "image_key" in columns
+        # полнотекстовый индекс заполнен товарами, которые были до миграции
+        found = await conn.scalar(text("SELECT rowid FROM products_fts WHERE products_fts MATCH 'chair'"))
+        assert found == 1
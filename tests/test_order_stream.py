@@ -0,0 +1,18 @@
+import logging
+
+import pytest
+
+from app.core.config import settings
+from app.main import app
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_startup_warns_when_stream_has_no_publisher(anyio_backend, monkeypatch, caplog):
+    # статусы в /orders/stream публикует только outbox-воркер
+    monkeypatch.setattr(settings, "OUTBOX_ENABLED", False)
+    monkeypatch.setattr(settings, "EVENTS_BACKEND", "memory")
+    with caplog.at_level(logging.WARNING, logger="app.main"):
+        async with app.router.lifespan_context(app):
+            pass
+    assert "/orders/stream will never emit events" in caplog.text
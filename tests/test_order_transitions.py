@@ -0,0 +1,116 @@
+from contextlib import contextmanager
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, select
+
+from app.api.deps import decode_access_token
+from app.core.database import async_session, engine
+from app.models.outbox import OutboxEvent
+from app.repositories.admin_repo import OrderService
+from app.repositories.order_repo import OrderRepo
+
+pytestmark = pytest.mark.anyio
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+async def place_order(client, headers: dict, product_id: int) -> int:
+    await client.post("/cart/items", json={"product_id": product_id, "quantity": 2}, headers=headers)
+    response = await client.post("/orders/", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+async def transition(action: str, order_id: int, user_id: int) -> tuple[list[str], int]:
+    async with async_session() as db:
+        repo = OrderRepo(db)
+        with count_statements() as statements:
+            try:
+                await getattr(repo, action)(order_id, user_id)
+                status = 200
+            except HTTPException as exc:
+                status = exc.status_code
+    return statements, status
+
+
+def user_id_of(headers: dict) -> int:
+    return decode_access_token(headers["Authorization"].split()[1])["user_id"]
+
+
+# условный UPDATE статуса, история, дельта аналитики (SELECT позиций + 2 upsert), событие outbox,
+# перечитывание заказа с позициями одним запросом
+PAY_STATEMENTS = 7
+# то же плюс возврат остатков одним UPDATE ... FROM order_items
+CANCEL_STATEMENTS = 8
+# неуспешный UPDATE и SELECT, отличающий 404 от 409
+FAILED_STATEMENTS = 2
+
+
+async def test_pay_and_cancel_statement_counts(client, users, product):
+    [headers] = await users(1)
+    user_id = user_id_of(headers)
+    product_id = await product(quantity=100)
+
+    paid = await place_order(client, headers, product_id)
+    statements, status = await transition("pay_order", paid, user_id)
+    assert status == 200
+    assert len(statements) == PAY_STATEMENTS, statements
+
+    cancelled = await place_order(client, headers, product_id)
+    statements, status = await transition("cancel_order", cancelled, user_id)
+    assert status == 200
+    assert len(statements) == CANCEL_STATEMENTS, statements
+
+
+async def test_failed_transitions_statement_counts(client, users, product):
+    [headers, other] = await users(2)
+    user_id = user_id_of(headers)
+    order_id = await place_order(client, headers, await product(quantity=100))
+    await transition("pay_order", order_id, user_id)
+
+    for action in ("pay_order", "cancel_order"):
+        # уже оплачен - 409
+        statements, status = await transition(action, order_id, user_id)
+        assert status == 409
+        assert len(statements) == FAILED_STATEMENTS, statements
+        # чужой или несуществующий заказ - 404
+        statements, status = await transition(action, order_id, user_id_of(other))
+        assert status == 404
+        assert len(statements) == FAILED_STATEMENTS, statements
+
+
+async def test_admin_status_change_loses_race_with_user_payment(client, users, product):
+    [headers] = await users(1)
+    user_id = user_id_of(headers)
+    order_id = await place_order(client, headers, await product(quantity=100))
+
+    async with async_session() as admin_db:
+        repo = OrderRepo(admin_db)
+        # админ успел прочитать заказ в статусе pending, после чего пользователь его оплатил
+        stale = await repo.get_order_by_id(order_id)  # держим ссылку: объект остаётся в identity map
+        assert stale.status == "pending"
+        await admin_db.commit()  # читающая транзакция SQLite не даст оплате записать
+        assert (await transition("pay_order", order_id, user_id))[1] == 200
+        with pytest.raises(HTTPException) as exc:
+            await OrderService(repo).change_order_status(order_id, "shipped")
+        assert exc.value.status_code == 409
+
+    async with async_session() as db:
+        assert (await OrderRepo(db).get_order_by_id(order_id)).status == "paid"
+        topics = await db.scalars(
+            select(OutboxEvent.topic).where(OutboxEvent.payload["order_id"].as_integer() == order_id)
+        )
+        assert "order.status_changed" not in topics.all()
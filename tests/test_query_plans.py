@@ -0,0 +1,28 @@
+import pytest
+
+from app.core.database import async_session, engine
+from app.repositories.outbox_repo import OutboxRepo
+from benchmarks.query_plans import PlanRecorder, print_report, run_scenarios, seed
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_repository_queries_use_indexes(capsys):
+    # тот же прогон, что python -m benchmarks.query_plans, на тестовой базе со схемой из миграций
+    product_ids, user_ids = await seed(products=200, users=10)
+    async with async_session() as db:
+        await OutboxRepo(db).add("plans.check", {"n": 1})
+        await db.commit()
+
+    recorder = PlanRecorder(engine.dialect.name)
+    recorder.attach(engine)
+    try:
+        await run_scenarios(recorder, user_ids[0], product_ids[:5:2])
+    finally:
+        recorder.detach(engine)
+
+    assert recorder.plans
+    if recorder.violations:
+        with capsys.disabled():
+            print_report(recorder, verbose=False)
+    assert not recorder.violations
@@ -0,0 +1,27 @@
+import pytest
+
+from app.core.rate_limit import InMemoryBucketStore, parse_limit, rate_limiter
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_idempotent_replay_does_not_spend_rate_limit(client, users, product, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "limits", {"orders_create": parse_limit("1/hour")})
+    monkeypatch.setattr(rate_limiter, "store", InMemoryBucketStore())
+    product_id = await product(quantity=10)
+    [headers] = await users(1)
+
+    async def checkout(**extra):
+        await client.post("/cart/items", json={"product_id": product_id, "quantity": 1}, headers=headers)
+        return await client.post("/orders/", headers={**headers, **extra})
+
+    first = await checkout(**{"Idempotency-Key": "order-1"})
+    assert first.status_code == 200, first.text
+
+    # повтор с тем же ключом получает сохранённый ответ, а не 429
+    replay = await client.post("/orders/", headers={**headers, "Idempotency-Key": "order-1"})
+    assert replay.status_code == 200, replay.text
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.json() == first.json()
+
+    assert (await checkout(**{"Idempotency-Key": "order-2"})).status_code == 429
@@ -0,0 +1,103 @@
+import hashlib
+import hmac
+import time
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI, HTTPException, Request
+
+from app.api.deps import get_current_user
+from app.core.cache import recent_writes
+from app.core.config import settings
+from app.core.read_your_writes import (
+    COOKIE_NAME,
+    ReadYourWritesMiddleware,
+    decode_cookie,
+    encode_cookie,
+    user_wrote_recently,
+)
+from app.core.security import create_access_token
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_checkout_does_not_pin_catalog_to_primary(client, users, product):
+    # заказы меняют остатки постоянно: если бы каждый привязывал каталог к primary, реплика бы простаивала
+    product_id = await product(quantity=3)
+    [headers] = await users(1)
+    recent_writes.pop("catalog")
+    response = await client.post("/cart/items", json={"product_id": product_id, "quantity": 1}, headers=headers)
+    assert response.status_code == 200, response.text
+
+    response = await client.post("/orders/", headers=headers)
+    assert response.status_code == 200, response.text
+    assert recent_writes.get("catalog") is None
+
+    response = await client.post(f"/orders/{response.json()['id']}/cancel", headers=headers)
+    assert response.status_code == 200, response.text
+    assert recent_writes.get("catalog") is None
+
+
+async def test_admin_product_write_pins_catalog_to_primary(client, product):
+    product_id = await product(quantity=3)
+    admin = {"Authorization": f"Bearer {create_access_token(1, 'admin')}"}
+    recent_writes.pop("catalog")
+
+    response = await client.put(
+        f"/admin/products/{product_id}",
+        json={"name": f"renamed product {product_id}", "price": 20, "quantity": 3},
+        headers=admin,
+    )
+    assert response.status_code == 200, response.text
+    assert recent_writes.get("catalog") is True
+
+
+def test_cookie_is_signed_and_expires():
+    value = encode_cookie(7, "user", time.time() + 5)
+    assert decode_cookie(value) == {"user_id": 7, "role": "user"}
+    assert decode_cookie(value.replace(":user:", ":admin:")) is None
+    assert decode_cookie(encode_cookie(7, "user", time.time() - 1)) is None
+    assert decode_cookie("garbage") is None
+
+
+def test_cookie_is_not_signed_with_the_jwt_secret_itself():
+    payload = "7:user:9999999999.000"
+    raw = hmac.new(settings.JWT_SECRET.encode(), payload.encode(), hashlib.sha256).hexdigest()
+    assert decode_cookie(f"{payload}:{raw}") is None
+
+
+async def test_write_window_travels_with_client(anyio_backend):
+    # второй запрос попадает на "другой воркер": в памяти процесса о записи ничего нет, остаётся cookie
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware, seconds=5)
+
+    @app.post("/write")
+    async def write(current_user: dict = Depends(get_current_user)):
+        return {}
+
+    @app.post("/rejected")
+    async def rejected(current_user: dict = Depends(get_current_user)):
+        raise HTTPException(409, "Conflict")
+
+    @app.get("/read")
+    async def read(request: Request, current_user: dict = Depends(get_current_user)):
+        return {"primary": user_wrote_recently(request, current_user["user_id"])}
+
+    headers = {"Authorization": f"Bearer {create_access_token(42, 'user')}"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        # отклонённая запись ничего не изменила: чтения остаются на реплике
+        recent_writes.clear()
+        response = await client.post("/rejected", headers=headers)
+        assert response.status_code == 409
+        assert COOKIE_NAME not in response.cookies
+        assert (await client.get("/read", headers=headers)).json() == {"primary": False}
+
+        response = await client.post("/write", headers=headers)
+        assert COOKIE_NAME in response.cookies
+        recent_writes.clear()
+        assert (await client.get("/read", headers=headers)).json() == {"primary": True}
+
+        other = {"Authorization": f"Bearer {create_access_token(43, 'user')}"}
+        assert (await client.get("/read", headers=other)).json() == {"primary": False}
+        client.cookies.clear()
+        assert (await client.get("/read", headers=headers)).json() == {"primary": False}
@@ -0,0 +1,29 @@
+import pytest
+
+from app.core.security import create_access_token
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_default_revenue_counts_only_sold_orders(client, users, product):
+    product_id = await product(quantity=10, price=7)
+    paid_buyer, cancelling_buyer = await users(2)
+    admin = {"Authorization": f"Bearer {create_access_token(1, 'admin')}"}
+    order_ids = []
+    for headers in (paid_buyer, cancelling_buyer):
+        response = await client.post("/cart/items", json={"product_id": product_id, "quantity": 2}, headers=headers)
+        assert response.status_code == 200, response.text
+        response = await client.post("/orders/", headers=headers)
+        assert response.status_code == 200, response.text
+        order_ids.append(response.json()["id"])
+    assert (await client.post(f"/orders/{order_ids[0]}/pay", headers=paid_buyer)).status_code == 200
+    assert (await client.post(f"/orders/{order_ids[1]}/cancel", headers=cancelling_buyer)).status_code == 200
+
+    async def product_sales(**params):
+        response = await client.get("/admin/analytics/products", params={"limit": 1000, **params}, headers=admin)
+        assert response.status_code == 200, response.text
+        return next(row for row in response.json() if row["product_id"] == product_id)
+
+    # отменённый заказ вернул остатки и в выручку по умолчанию не входит
+    assert await product_sales() == {"product_id": product_id, "orders": 1, "units": 2, "revenue": 14.0}
+    assert (await product_sales(status="cancelled"))["revenue"] == 14.0